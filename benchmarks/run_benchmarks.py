@@ -0,0 +1,371 @@
+"""
+Benchmarks of the request processing pipeline.
+
+Every graph and analysis query from resources/examples.json and from the generated corpus is replayed, and each
+stage is timed separately:
+- graph_parse: GraphParser.parse
+- graph_draw: drawing of the plot in Graph.render (without encoding)
+- graph_encode: rasterization and encoding of the plot (it replaced savefig)
+- analysis_parse: CalculusParser.parse
+- process_query: calculation of the result (CalculusParser.calculate, the body of process_query)
+- run_tex: run_TeX (only if TeX distribution is installed)
+- resize_image: resize_image of the TeX picture (only if TeX distribution is installed)
+
+Stages run in this process without the worker pools, so the timings don't include the communication between
+processes. Sympy cache is cleared before every query, so the results don't depend on the order of the queries.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --output new.json --compare baseline.json --threshold 0.2
+"""
+import argparse
+import json
+import platform
+import random
+import shutil
+import signal
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+import sympy as sy
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# pylint: disable=wrong-import-position
+from source.extras.utilities import run_TeX, resize_image
+from source.math.calculus_parser import CalculusParser
+from source.math.graph import Graph
+from source.math.graph_parser import GraphParser
+
+EXAMPLES_PATH = Path(__file__).resolve().parents[1] / "resources" / "examples.json"
+
+PERCENTILES = (50, 90, 99)
+
+# Building blocks of the generated corpus
+UNARY_FUNCTIONS = ["sin", "cos", "tan", "exp", "log", "sqrt", "abs", "atan", "cosh"]
+TERMS = ["x", "x^2", "x^3", "2x", "x - 1", "x + 3", "1 / x", "1 / (x^2 + 1)"]
+IMPLICIT_TERMS = ["x^2", "y^2", "x y", "sin x", "cos y", "x^3", "y^3", "exp(x / 4)", "2y", "3x"]
+ANALYSIS_TEMPLATES = ["derivative of {}", "domain of {}", "range of {}", "zeros of {}", "axes intersection of {}",
+                      "periodicity of {}", "convexity of {}", "asymptotes of {}", "is {} even", "is {} odd",
+                      "maximum of {}", "minimum of {}", "stationary points of {}", "monotonicity of {}"]
+
+
+class StageTimeout(Exception):
+    """This exception is raised when a stage exceeds the time limit"""
+
+
+def _random_function(rng: random.Random, depth: int = 2) -> str:
+    term = rng.choice(TERMS)
+    if depth == 0:
+        return term
+    match rng.randrange(4):
+        case 0:
+            return f"{rng.choice(UNARY_FUNCTIONS)}({_random_function(rng, depth - 1)})"
+        case 1:
+            return f"{_random_function(rng, depth - 1)} + {rng.randint(1, 5)} {term}"
+        case 2:
+            return f"({_random_function(rng, depth - 1)}) / ({term} + {rng.randint(1, 5)})"
+        case _:
+            return f"{rng.randint(1, 5)} {rng.choice(UNARY_FUNCTIONS)}({term})"
+
+
+def generate_corpus(size: int, seed: int) -> dict:
+    """
+    Generate random graph and analysis queries
+    :param size: the number of queries of each kind
+    :param seed: seed of the random generator, the same seed gives the same corpus
+    :return: dictionary like examples.json
+    """
+    rng = random.Random(seed)
+    graph, analysis = [], []
+    for _ in range(size):
+        if rng.random() < 0.3:
+            left = " + ".join(rng.sample(IMPLICIT_TERMS, 2))
+            right = " - ".join(rng.sample(IMPLICIT_TERMS, 2))
+            graph.append(f"{left} = {right}")
+        else:
+            functions = ", ".join(_random_function(rng) for _ in range(rng.randint(1, 3)))
+            graph.append(f"{functions}, x from -{rng.randint(1, 20)} to {rng.randint(1, 20)}")
+        analysis.append(rng.choice(ANALYSIS_TEMPLATES).format(_random_function(rng)))
+    return {"graph": graph, "analysis": analysis}
+
+
+@contextmanager
+def _time_limit(seconds: float):
+    """
+    Interrupt the block if it runs longer than the given time. It works only on the platforms with SIGALRM
+    """
+    if not seconds or not hasattr(signal, "SIGALRM"):
+        yield
+        return
+
+    def handler(*_):
+        raise StageTimeout()
+
+    previous = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class Recorder:
+    """
+    Collects timings and memory peaks of the stages
+
+    :param trace_memory: measure memory peaks with tracemalloc (it slows down the stages)
+    """
+
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.times = {}
+        self.memory = {}
+        self.errors = {}
+
+    def add(self, stage: str, seconds: float, peak: int | None = None):
+        """
+        Add a measurement of the stage
+        :param stage: name of the stage
+        :param seconds: duration of the stage
+        :param peak: memory peak in bytes (if it was measured)
+        """
+        self.times.setdefault(stage, []).append(seconds)
+        if peak is not None:
+            self.memory.setdefault(stage, []).append(peak)
+
+    def run(self, stage: str, func, *args):
+        """
+        Measure the function call
+        :param stage: name of the stage
+        :param func: function to call
+        :param args: arguments of the function
+        :return: the result of the function
+        """
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        self.add(stage, elapsed, tracemalloc.get_traced_memory()[1] if self.trace_memory else None)
+        return result
+
+    def error(self, stage: str, err: Exception):
+        """
+        Count the failed call of the stage
+        :param stage: name of the stage
+        :param err: exception raised by the stage
+        """
+        self.errors.setdefault(stage, {})
+        name = type(err).__name__
+        self.errors[stage][name] = self.errors[stage].get(name, 0) + 1
+
+    def summary(self) -> dict:
+        """
+        :return: statistics of every stage
+        """
+        stages = {}
+        for stage in sorted(set(self.times) | set(self.errors)):
+            times = np.array(self.times.get(stage, []))
+            stats = {"count": len(times), "errors": self.errors.get(stage, {})}
+            if len(times):
+                stats.update({
+                    "total": float(times.sum()),
+                    "mean": float(times.mean()),
+                    "max": float(times.max()),
+                    **{f"p{q}": float(np.percentile(times, q)) for q in PERCENTILES}
+                })
+            if memory := self.memory.get(stage):
+                stats["memory_peak_max"] = int(max(memory))
+                stats["memory_peak_p50"] = int(np.percentile(memory, 50))
+            stages[stage] = stats
+        return stages
+
+
+def bench_graph(recorder: Recorder, query: str, time_limit: float):
+    """
+    Parse and draw the graph query
+    """
+    parser = GraphParser()
+    stage = "graph_parse"
+    try:
+        with _time_limit(time_limit):
+            recorder.run(stage, GraphParser.parse.__wrapped__, parser, query)
+
+            stage = "graph_draw"
+            if recorder.trace_memory:
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            image = Graph.render(parser.tokens)
+            elapsed = time.perf_counter() - start
+    except Exception as err:  # pylint: disable=broad-except
+        recorder.error(stage, err)
+        return
+
+    # Encoding is a part of the render, its duration is measured by the encoder itself
+    peak = tracemalloc.get_traced_memory()[1] if recorder.trace_memory else None
+    recorder.add("graph_draw", elapsed - image.encode_time, peak)
+    recorder.add("graph_encode", image.encode_time)
+
+
+def bench_analysis(recorder: Recorder, query: str, time_limit: float, use_tex: bool):
+    """
+    Parse and calculate the analysis query and render its result with TeX
+    """
+    parser = CalculusParser()
+    stage = "analysis_parse"
+    try:
+        with _time_limit(time_limit):
+            if not recorder.run(stage, CalculusParser.parse.__wrapped__, parser, query):
+                return
+
+            stage = "process_query"
+            result = recorder.run(stage, parser.calculate, "en")
+
+            if use_tex:
+                stage = "run_tex"
+                with BytesIO() as latex_picture, BytesIO() as resized_image:
+                    recorder.run(stage, run_TeX.__wrapped__, parser.make_latex(result), latex_picture)
+                    stage = "resize_image"
+                    recorder.run(stage, resize_image.__wrapped__, latex_picture, resized_image)
+    except Exception as err:  # pylint: disable=broad-except
+        recorder.error(stage, err)
+
+
+def _replay(recorder: Recorder, queries: dict, repeat: int, time_limit: float, use_tex: bool):
+    for _ in range(repeat):
+        for query in queries["graph"]:
+            sy.core.cache.clear_cache()
+            bench_graph(recorder, query, time_limit)
+        for query in queries["analysis"]:
+            sy.core.cache.clear_cache()
+            bench_analysis(recorder, query, time_limit, use_tex)
+
+
+def run(queries: dict, repeat: int, time_limit: float, trace_memory: bool, use_tex: bool) -> dict:
+    """
+    Replay all queries. Tracing of the memory slows down the stages, so memory peaks are measured
+    in the separate pass
+    :param queries: dictionary with 'graph' and 'analysis' lists of queries
+    :param repeat: the number of times every query is replayed
+    :param time_limit: time limit of every query in seconds
+    :param trace_memory: measure memory peaks
+    :param use_tex: benchmark TeX rendering
+    :return: statistics of every stage
+    """
+    recorder = Recorder(False)
+    _replay(recorder, queries, repeat, time_limit, use_tex)
+    stages = recorder.summary()
+    if not trace_memory:
+        return stages
+
+    recorder = Recorder(True)
+    tracemalloc.start()
+    try:
+        _replay(recorder, queries, 1, time_limit, use_tex)
+    finally:
+        tracemalloc.stop()
+    for stage, stats in recorder.summary().items():
+        if stage in stages and "memory_peak_max" in stats:
+            stages[stage]["memory_peak_max"] = stats["memory_peak_max"]
+            stages[stage]["memory_peak_p50"] = stats["memory_peak_p50"]
+    return stages
+
+
+def compare(current: dict, baseline: dict, threshold: float, metrics: tuple = ("p50", "p90")) -> list:
+    """
+    Find stages that became slower than in the baseline
+    :param current: results of the current run
+    :param baseline: results of the baseline run
+    :param threshold: allowed relative slowdown (0.2 means 20%)
+    :param metrics: compared statistics
+    :return: list of regressions as tuples (stage, metric, baseline value, current value)
+    """
+    regressions = []
+    for stage, stats in current["stages"].items():
+        base = baseline["stages"].get(stage)
+        if base is None:
+            continue
+        for metric in metrics:
+            if metric in stats and metric in base and stats[metric] > base[metric] * (1 + threshold):
+                regressions.append((stage, metric, base[metric], stats[metric]))
+    return regressions
+
+
+def main():
+    """
+    Run the benchmarks from the command line
+    """
+    arg_parser = argparse.ArgumentParser(description="Benchmarks of the request processing pipeline")
+    arg_parser.add_argument("--output", default="benchmark_results.json", help="file for the results")
+    arg_parser.add_argument("--compare", metavar="BASELINE", help="results to compare with")
+    arg_parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown")
+    arg_parser.add_argument("--corpus-size", type=int, default=100, help="number of generated queries of each kind")
+    arg_parser.add_argument("--seed", type=int, default=0, help="seed of the generated corpus")
+    arg_parser.add_argument("--repeat", type=int, default=1, help="number of times every query is replayed")
+    arg_parser.add_argument("--time-limit", type=float, default=60, help="time limit of every query in seconds")
+    arg_parser.add_argument("--no-memory", action="store_true", help="don't measure memory peaks")
+    arg_parser.add_argument("--no-tex", action="store_true", help="don't benchmark TeX rendering")
+    args = arg_parser.parse_args()
+
+    with open(EXAMPLES_PATH, encoding="utf-8") as file:
+        queries = json.load(file)
+    corpus = generate_corpus(args.corpus_size, args.seed)
+    queries = {kind: queries[kind] + corpus[kind] for kind in ("graph", "analysis")}
+
+    try:
+        Graph.setup_plot_style()
+    except OSError as err:
+        print(f"Plot style is not applied: {err}", file=sys.stderr)
+
+    use_tex = not args.no_tex and shutil.which("latex") is not None
+    if not args.no_tex and not use_tex:
+        print("TeX distribution is not found, run_tex and resize_image stages are skipped", file=sys.stderr)
+
+    results = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sympy": sy.__version__,
+            "numpy": np.__version__,
+            "matplotlib": matplotlib.__version__,
+            "queries": {kind: len(queries[kind]) for kind in queries},
+            "corpus seed": args.seed,
+            "repeat": args.repeat,
+            "memory": not args.no_memory,
+            "tex": use_tex
+        },
+        "stages": run(queries, args.repeat, args.time_limit, not args.no_memory, use_tex)
+    }
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+
+    print(f"{'stage':<16}{'count':>7}{'errors':>8}{'p50, ms':>10}{'p90, ms':>10}{'p99, ms':>10}{'peak, MB':>10}")
+    for stage, stats in results["stages"].items():
+        timings = [f"{stats.get(f'p{q}', float('nan')) * 1000:>10.1f}" for q in PERCENTILES]
+        peak = f"{stats['memory_peak_max'] / 2 ** 20:>10.1f}" if "memory_peak_max" in stats else f"{'-':>10}"
+        print(f"{stage:<16}{stats['count']:>7}{sum(stats['errors'].values()):>8}{''.join(timings)}{peak}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if regressions := compare(results, baseline, args.threshold):
+            for stage, metric, base, current in regressions:
+                print(f"REGRESSION {stage} {metric}: {base * 1000:.1f} ms -> {current * 1000:.1f} ms "
+                      f"(+{(current / base - 1) * 100:.0f}%)")
+            sys.exit(1)
+        print("No regressions found")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ import sys
 from pathlib import Path
 from jsonschema import validate, ValidationError
 
+from source.conf.patterns import PatternRegistry
+
 default_config_schema = {
     "type": "object",
     "properties": {
@@ -34,9 +36,12 @@ default_config_schema = {
                         },
                         "implicit_function_points": {
                             "type": "number"
+                        },
+                        "explicit_function_points": {
+                            "type": "number"
                         }
                     },
-                    "required": ["style", "implicit_function_points"]
+                    "required": ["style", "implicit_function_points", "explicit_function_points"]
                 },
                 "RC_PARAMS": {
                     "type": "object",
@@ -82,6 +87,147 @@ default_config_schema = {
                 },
             }
         },
+        "IMAGE_OUTPUT": {
+            "type": "object",
+            "properties": {
+                "format": {
+                    "type": "string",
+                    "enum": ["png", "webp", "jpeg"]
+                },
+                "dpi": {
+                    "type": "number"
+                },
+                "max_side": {
+                    "type": "number"
+                },
+                "max_bytes": {
+                    "type": "number"
+                },
+                "quality": {
+                    "type": "number"
+                }
+            },
+            "required": ["format", "dpi", "max_side", "max_bytes", "quality"]
+        },
+        "PREVIEW": {
+            "type": "object",
+            "properties": {
+                "enabled": {
+                    "type": "boolean"
+                },
+                "min_implicit_functions": {
+                    "type": "number"
+                },
+                "dpi": {
+                    "type": "number"
+                },
+                "explicit_function_points": {
+                    "type": "number"
+                },
+                "implicit_function_points": {
+                    "type": "number"
+                }
+            },
+            "required": ["enabled", "min_implicit_functions", "dpi", "explicit_function_points",
+                         "implicit_function_points"]
+        },
+        "WORKERS": {
+            "type": "object",
+            "properties": {
+                "render_processes": {
+                    "type": "number"
+                },
+                "analysis_processes": {
+                    "type": "number"
+                },
+                "wall_time_limit": {
+                    "type": "number"
+                },
+                "cpu_time_limit": {
+                    "type": "number"
+                },
+                "study_processes": {
+                    "type": "number"
+                },
+                "study_time_limit": {
+                    "type": "number"
+                }
+            },
+            "required": ["render_processes", "analysis_processes", "wall_time_limit", "cpu_time_limit",
+                         "study_processes", "study_time_limit"]
+        },
+        "RENDER_CACHE": {
+            "type": "object",
+            "properties": {
+                "memory_limit": {
+                    "type": "number"
+                },
+                "disk_limit": {
+                    "type": "number"
+                },
+                "directory": {
+                    "type": "string"
+                }
+            },
+            "required": ["memory_limit", "disk_limit", "directory"]
+        },
+        "RESULT_CACHE": {
+            "type": "object",
+            "properties": {
+                "memory_limit": {
+                    "type": "number"
+                },
+                "ttl": {
+                    "type": "number"
+                }
+            },
+            "required": ["memory_limit", "ttl"]
+        },
+        "NUMERIC_ANALYSIS": {
+            "type": "object",
+            "properties": {
+                "window": {
+                    "type": "number"
+                },
+                "points": {
+                    "type": "number"
+                },
+                "max_points": {
+                    "type": "number"
+                },
+                "deadline": {
+                    "type": "number"
+                }
+            },
+            "required": ["window", "points", "max_points", "deadline"]
+        },
+        "FUNCTION_ALIASES": {
+            "type": "object",
+            "propertyNames": {
+                "pattern": "^[A-Za-z]+$"
+            },
+            "additionalProperties": {
+                "type": "string"
+            }
+        },
+        "EXPRESSION_LIMITS": {
+            "type": "object",
+            "properties": {
+                "max_nodes": {
+                    "type": "number"
+                },
+                "max_depth": {
+                    "type": "number"
+                },
+                "max_exponent": {
+                    "type": "number"
+                },
+                "max_literal_digits": {
+                    "type": "number"
+                }
+            },
+            "required": ["max_nodes", "max_depth", "max_exponent", "max_literal_digits"]
+        },
         "DB_PARAMS": {
             "type": "object",
             "properties": {
@@ -99,7 +245,8 @@ default_config_schema = {
             "required": ["database_name", "ip", "port"]
         }
     },
-    "required": ["APP", "PLOT_APPEARANCE", "DB_PARAMS"]
+    "required": ["APP", "PLOT_APPEARANCE", "IMAGE_OUTPUT", "PREVIEW", "WORKERS", "RENDER_CACHE", "RESULT_CACHE",
+                 "NUMERIC_ANALYSIS", "FUNCTION_ALIASES", "EXPRESSION_LIMITS", "DB_PARAMS"]
 }
 
 if sys.hexversion < 0x30A0000:
@@ -122,6 +269,8 @@ class Config:
     _default_file_path = Path(__file__).resolve().parent / "default_config.json"
     graph_patterns = None
     analysis_patterns = None
+    graph_registry: PatternRegistry = None
+    analysis_registry: PatternRegistry = None
 
     def __new__(cls, *args, **kwargs):
         if not Config._instance:
@@ -135,6 +284,8 @@ class Config:
         self._file_path = file_path or Config._default_file_path
         self._json_data = self._load_from_json()
         Config.graph_patterns, Config.analysis_patterns = self._open_patterns_files()
+        Config.graph_registry = PatternRegistry(Config.graph_patterns)
+        Config.analysis_registry = PatternRegistry(Config.analysis_patterns)
         Config._properties = {}
 
         for name, value in self._json_data.items():
@@ -0,0 +1,156 @@
+"""
+Registry of precompiled query patterns
+"""
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+# The accuracy of the prediction system. The bigger the number, the more similar the words need to be to correct it
+PREDICTION_ACCURACY = 0.7
+
+# The number of corrected queries kept in memory by every registry
+CORRECTIONS_CACHE_SIZE = 4096
+
+# Only words longer than this are corrected
+MIN_CORRECTED_LENGTH = 2
+
+
+def _ratio(matches: int, length: int) -> float:
+    return 2.0 * matches / length if length else 1.0
+
+
+class KeywordIndex:
+    """
+    Index of keywords for the fuzzy correction of words. It finds the same keyword as
+    difflib.get_close_matches(word, keywords, n=1, cutoff), but keywords are grouped by their length and their
+    letters are counted beforehand, so most of them are rejected by the upper bounds of the similarity
+    without building the longest matching blocks
+
+    :param keywords: list of keywords
+    :param cutoff: the minimum similarity of the word and the keyword
+    """
+
+    def __init__(self, keywords: list, cutoff: float = PREDICTION_ACCURACY):
+        self.cutoff = cutoff
+        self._by_length = {}
+        for keyword in dict.fromkeys(keywords):
+            self._by_length.setdefault(len(keyword), []).append((keyword, Counter(keyword)))
+
+    def closest(self, word: str) -> str | None:
+        """
+        Find the most similar keyword
+        :param word: word to correct
+        :return: the keyword or None if there is no keyword similar enough
+        """
+        matcher = SequenceMatcher()
+        matcher.set_seq2(word)
+        letters = Counter(word)
+        best = None
+
+        for length, keywords in self._by_length.items():
+            # The similarity can't be greater than the ratio of the lengths
+            total = length + len(word)
+            if _ratio(min(length, len(word)), total) < self.cutoff:
+                continue
+
+            for keyword, keyword_letters in keywords:
+                # ... and the number of common letters
+                if _ratio(sum((letters & keyword_letters).values()), total) < self.cutoff:
+                    continue
+
+                matcher.set_seq1(keyword)
+                score = matcher.ratio()
+                if score >= self.cutoff and (best is None or (score, keyword) > best):
+                    best = (score, keyword)
+
+        return best[1] if best is not None else None
+
+
+class PatternMatch:
+    """
+    This class represents a query matched with one of the patterns
+
+    :param pattern_set: a class of the pattern (e.g. domain, derivative)
+    :param match: match object of the pattern itself, so its groups are numbered as in the patterns file
+    :param params: numbers of the groups with parameters of the query
+    """
+
+    def __init__(self, pattern_set: str, match: re.Match, params: list):
+        self.pattern_set = pattern_set
+        self.match = match
+        self.params = params
+
+
+class PatternRegistry:
+    """
+    This class compiles the patterns once and matches the query against all of them in a single pass.
+    All patterns are joined into one alternation, where every pattern is wrapped in a named group. Alternatives
+    are tried in the order of the patterns file, so the first suitable pattern is found as if the patterns were
+    tried one by one. Then only the found pattern is matched again to get its own groups
+
+    :param pattern_dict: dictionary of patterns loaded from the patterns file. Each pattern set has 'patterns'
+        (a dictionary of regular expressions and the numbers of their parameter groups) and 'keywords'
+    :param cutoff: the minimum similarity of the word and the keyword to correct the word
+    """
+
+    def __init__(self, pattern_dict: dict, cutoff: float = PREDICTION_ACCURACY):
+        self.pattern_dict = pattern_dict
+        self._patterns = []
+        self._combined = {}
+        self._keywords = {pattern_set: KeywordIndex(value["keywords"], cutoff)
+                          for pattern_set, value in pattern_dict.items()}
+        self.correct = lru_cache(maxsize=CORRECTIONS_CACHE_SIZE)(self._correct)
+
+        alternatives = {}
+        for pattern_set, value in pattern_dict.items():
+            for pattern, params in value["patterns"].items():
+                name = f"p{len(self._patterns)}"
+                self._patterns.append((pattern_set, re.compile(pattern), list(map(int, params))))
+                alternatives.setdefault(pattern_set, []).append(f"(?P<{name}>{pattern})")
+
+        self._combined[None] = re.compile("|".join(sum(alternatives.values(), [])))
+        for pattern_set, group in alternatives.items():
+            self._combined[pattern_set] = re.compile("|".join(group))
+
+    def __iter__(self):
+        return iter(self.pattern_dict)
+
+    def keywords(self, pattern_set: str) -> list:
+        """
+        :param pattern_set: a class of the pattern
+        :return: keywords of the pattern set that are used to correct the query
+        """
+        return self.pattern_dict[pattern_set]["keywords"]
+
+    def _correct(self, query: str, pattern_set: str) -> tuple:
+        """
+        Tries to correct words of the query to fit the keywords of the pattern set.
+        The results are cached, use 'correct' method to call it
+        :param query: query to correct
+        :param pattern_set: a class of the pattern
+        :return: corrected query (or empty string if nothing was changed) and
+            a tuple of corrections (word, keyword)
+        """
+        index = self._keywords[pattern_set]
+        result = query
+        corrections = []
+        for word in re.split("[ =]", query):
+            if len(word) > MIN_CORRECTED_LENGTH and (keyword := index.closest(word)) is not None and keyword != word:
+                result = result.replace(word, keyword)
+                corrections.append((word, keyword))
+
+        return (result if result != query else ""), tuple(corrections)
+
+    def match(self, query: str, pattern_set: str = None) -> PatternMatch | None:
+        """
+        Find the first pattern matching the query
+        :param query: string to match
+        :param pattern_set: if it is given, then only the patterns of this set are considered
+        :return: the match or None if no pattern matches the query
+        """
+        if (combined_match := self._combined[pattern_set].match(query)) is None:
+            return None
+
+        found_set, pattern, params = self._patterns[int(combined_match.lastgroup[1:])]
+        return PatternMatch(found_set, pattern.match(query), params)
@@ -2,6 +2,7 @@
 Database module
 """
 import logging
+from datetime import datetime
 
 from aiogram import types, Bot
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -27,6 +28,8 @@ class MongoDatabase:
             serverSelectionTimeoutMS=3000)
         self.db = None
         self.chat_status_table = None
+        self.file_id_table = None
+        self.result_table = None
 
     async def init(self):
         """Initialise connection to mongo database"""
@@ -34,6 +37,12 @@ class MongoDatabase:
             self.db = self.client[self.conf.properties["DB_PARAMS"]["database_name"]]
             self.chat_status_table = self.db["chat_status"]
             await self.chat_status_table.create_index("chat_id", unique=True)
+            self.file_id_table = self.db["file_ids"]
+            await self.file_id_table.create_index("fingerprint", unique=True)
+            self.result_table = self.db["results"]
+            await self.result_table.create_index("fingerprint", unique=True)
+            await self.result_table.create_index("created",
+                                                 expireAfterSeconds=self.conf.properties["RESULT_CACHE"]["ttl"])
             self.logger.debug(await self.client.server_info())
             self.logger.debug("Database connection installed")
         except Exception as exc:
@@ -144,3 +153,42 @@ class MongoDatabase:
         except Exception as exc:
             await self.bot.send_message(user_id, _(no_db_message))
             self.logger.warning(exc)
+
+    async def get_file_id(self, fingerprint: str) -> str | None:
+        """Return Telegram file_id of the image uploaded earlier for the result with the given fingerprint"""
+        try:
+            document = await self.file_id_table.find_one({"fingerprint": fingerprint})
+        except Exception as exc:
+            self.logger.warning(exc)
+            return None
+        return document["file_id"] if document is not None else None
+
+    async def save_file_id(self, fingerprint: str, file_id: str | None):
+        """Remember Telegram file_id of the uploaded image, so the same result isn't uploaded again.
+        If file_id is None, then the saved one is removed (e.g. if Telegram rejects it)"""
+        try:
+            if file_id is None:
+                await self.file_id_table.delete_one({"fingerprint": fingerprint})
+            else:
+                await self.file_id_table.update_one({"fingerprint": fingerprint}, {"$set": {"file_id": file_id}},
+                                                    upsert=True)
+        except Exception as exc:
+            self.logger.warning(exc)
+
+    async def get_result(self, fingerprint: str, kind: str) -> bytes | None:
+        """Return the cached result of the request with the given fingerprint (e.g. kind is 'image' or 'text')"""
+        try:
+            document = await self.result_table.find_one({"fingerprint": fingerprint, kind: {"$exists": True}},
+                                                        {kind: True})
+        except Exception as exc:
+            self.logger.warning(exc)
+            return None
+        return bytes(document[kind]) if document is not None else None
+
+    async def save_result(self, fingerprint: str, kind: str, value: bytes):
+        """Cache the result of the request. The results are removed by the TTL index when they expire"""
+        try:
+            await self.result_table.update_one({"fingerprint": fingerprint},
+                                               {"$set": {kind: value, "created": datetime.utcnow()}}, upsert=True)
+        except Exception as exc:
+            self.logger.warning(exc)
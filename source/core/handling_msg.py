@@ -1,8 +1,10 @@
 """
 In this module we process events related to bot (such as messages, requests)
 """
+import asyncio
 import logging
 from io import BytesIO
+from pathlib import Path
 
 import aiohttp
 import telegram
@@ -14,9 +16,11 @@ from pymongo import errors
 import source.math.help_functions as hlp
 from source.conf import Config
 from source.core.database import MongoDatabase, no_db_message
+from source.extras.cache import RenderCache, ResultCache
 from source.extras.status import Status
 from source.extras.translation import _, graph_guide_texts, analysis_guide_texts
 from source.extras.utilities import run_TeX, resize_image
+from source.extras.workers import JobTimeoutError, WorkerError
 from source.keyboards.inline_keyboards import chat_help_markup, reply_markup_graph, reply_markup_analysis
 from source.math.calculus_parser import CalculusParser
 from source.math.graph import Graph, DrawError
@@ -34,6 +38,10 @@ class Handler:
     status_dict: dict = None
     # We get "USE_LATEX" parameter from settings
     SETTINGS: Config = None
+    render_cache: RenderCache = None
+    result_cache: ResultCache = None
+    # Time (in seconds) after which the approximate result of the analysis is sent
+    NUMERIC_ANALYSIS: dict = None
 
     def __init__(self, bot_, mongo_, logger_, dispatcher):
         Handler.bot = bot_
@@ -64,6 +72,12 @@ class Handler:
         Handler.status_dict.update({value: key.lower() for key, value in Handler.status_dict.items()})
         Handler.SETTINGS = Config()
 
+        cache_params = Handler.SETTINGS.properties["RENDER_CACHE"]
+        Handler.render_cache = RenderCache(cache_params["memory_limit"], cache_params["disk_limit"],
+                                           Path(__file__).parents[2] / cache_params["directory"])
+        Handler.result_cache = ResultCache(Handler.SETTINGS.properties["RESULT_CACHE"]["memory_limit"], mongo_)
+        Handler.NUMERIC_ANALYSIS = Handler.SETTINGS.properties["NUMERIC_ANALYSIS"]
+
         @dispatcher.message_handler(commands=["start"])
         @rate_limit(limit=1)
         async def start(message: types.Message):
@@ -238,6 +252,106 @@ class Handler:
             message.text = expr
             await Handler.send_analyse(message)
 
+    @staticmethod
+    async def _send_saved_photo(chat_id: int, fingerprint: str, caption: str) -> bool:
+        """
+        Send the image that has been already uploaded to Telegram for the result with the same fingerprint
+        :param chat_id: id of the chat
+        :param fingerprint: fingerprint of the result
+        :param caption: caption of the photo
+        :return: true if the photo was sent, false if it has to be uploaded
+        """
+        if (file_id := await Handler.mongo.get_file_id(fingerprint)) is None:
+            return False
+
+        try:
+            await Handler.bot.send_photo(chat_id=chat_id, photo=file_id, caption=caption)
+        except BadRequest as err:
+            # Telegram doesn't know this file anymore, so we upload it again
+            Handler.logger.info("Saved file_id of the result %s was rejected: %s", fingerprint, err)
+            await Handler.mongo.save_file_id(fingerprint, None)
+            return False
+        return True
+
+    @staticmethod
+    async def _save_file_id(fingerprint: str, sent: types.Message | bool):
+        """
+        Remember file_id of the uploaded photo to send it again without uploading
+        :param fingerprint: fingerprint of the result
+        :param sent: the message with the photo
+        """
+        if isinstance(sent, types.Message) and sent.photo:
+            await Handler.mongo.save_file_id(fingerprint, sent.photo[-1].file_id)
+
+    @staticmethod
+    def _worker_error_message(err: Exception, lang: str) -> str:
+        """
+        Make a reply to the user about the failed job
+        :param err: DrawError, JobTimeoutError or other WorkerError
+        :param lang: language of the user
+        :return: message text
+        """
+        if isinstance(err, JobTimeoutError):
+            return _("The request takes too long to process. Try to simplify the expression "
+                     "or narrow down the domain.", locale=lang)
+        if isinstance(err, WorkerError):
+            return _("Sorry, something went wrong while processing the request. Please try again.", locale=lang)
+        return str(err)
+
+    @staticmethod
+    async def _send_graph_preview(graph: Graph, tokens: dict, lang: str, chat_id: int,
+                                  full_render: asyncio.Future) -> types.Message | None:
+        """
+        Draw the low-quality plot while the full-quality one is being drawn and send it to the user
+        :param graph: graph to draw
+        :param tokens: parsed user input shared by both renders
+        :param lang: language of the plot
+        :param chat_id: id of the chat
+        :param full_render: the future of the full-quality image
+        :return: the message with the preview or None if the full-quality image is ready earlier
+        """
+        preview = await graph.draw(tokens, lang, preview=True)
+        if full_render.done():
+            return None
+        Handler.logger.debug("Graph preview is encoded in %.3f s: %s bytes", preview.encode_time, len(preview))
+        with BytesIO(preview.data) as image:
+            return await Handler.bot.send_photo(chat_id=chat_id, photo=image,
+                                                caption=_("Preview, the graph in full quality is on its way..."))
+
+    @staticmethod
+    async def _calculate_with_deadline(parser: CalculusParser, lang: str, chat_id: int) -> tuple:
+        """
+        Calculate the result of the analysis. If it takes longer than the deadline and the result can be
+        calculated numerically, then the approximate result is sent to the user while the exact one is calculated.
+        The approximate result is also the answer if the exact calculation exceeds the time limit
+        :param parser: parser of the request
+        :param lang: language of the user
+        :param chat_id: id of the chat
+        :return: list of results and false if it is the approximate result that replaces the exact one
+            (it must not be cached, so the exact result can be calculated next time)
+        """
+        exact = asyncio.ensure_future(parser.process_query(lang))
+        try:
+            return await asyncio.wait_for(asyncio.shield(exact), Handler.NUMERIC_ANALYSIS["deadline"]), True
+        except asyncio.TimeoutError:
+            pass
+
+        numeric = None
+        try:
+            numeric = await parser.process_numeric(lang)
+        except WorkerError as err:
+            Handler.logger.info("Numeric analysis failed: %s", err)
+
+        if numeric is not None and not exact.done():
+            await Handler.bot.send_message(chat_id, _("Approximate answer, the exact one is on its way...\n{}",
+                                                      locale=lang).format(numeric[0]))
+        try:
+            return await exact, True
+        except JobTimeoutError:
+            if numeric is None:
+                raise
+            return numeric, False
+
     @staticmethod
     async def send_graph(message: types.Message):
         """User requested to draw a plot"""
@@ -251,29 +365,63 @@ class Handler:
         Handler.logger.info("User [chat_id=%s] requested to draw a graph. User's input: `%s`", chat_id, expr)
 
         parser = GraphParser()
+        preview_message = None
 
         try:
             await parser.parse(expr, user_language)
-            graph = Graph()
-            image = await graph.draw(parser.tokens, user_language)
+
+            # Identical requests are drawn only once, next time the image is taken from the cache.
+            # If the image has been already uploaded to Telegram, then it isn't even uploaded again
+            fingerprint = Graph.fingerprint(parser.tokens, user_language)
+            caption = _("Here a graph of requested functions") + '\n' + "\n".join(parser.warnings)
+            if await Handler._send_saved_photo(chat_id, fingerprint, caption):
+                parser.clear_warnings()
+                return
+
+            if (image_bytes := Handler.render_cache.get(fingerprint)) is None:
+                graph = Graph()
+                full_render = asyncio.ensure_future(graph.draw(parser.tokens, user_language))
+                if Graph.needs_preview(parser.tokens):
+                    try:
+                        preview_message = await Handler._send_graph_preview(graph, parser.tokens, user_language,
+                                                                            chat_id, full_render)
+                    except Exception as err:  # pylint: disable=broad-except
+                        # The preview is optional: the full-quality image is sent as usual, or its own error
+                        # is reported. The worker job of the full render can't be cancelled anyway
+                        Handler.logger.info("Graph preview failed for user [chat_id=%s]: %s: %s",
+                                            chat_id, type(err).__name__, err)
+                encoded = await full_render
+                Handler.logger.debug("Graph is encoded in %.3f s: %s %sx%s, %s bytes", encoded.encode_time,
+                                     encoded.image_format, *encoded.size, len(encoded))
+                image_bytes = encoded.data
+                Handler.render_cache.put(fingerprint, image_bytes)
+            Handler.logger.debug("Render cache: %s", Handler.render_cache.stats)
+            image = BytesIO(image_bytes)
         except ParseError as err:
             await message.reply(str(err))
             Handler.logger.info("ParseError exception raised on user's [chat_id=%s] input: `%s`\nException message",
                                 chat_id, expr, err)
             return
-        except DrawError as err:
-            await message.reply(str(err))
-            Handler.logger.info("DrawError exception raised on user's [chat_id=%s] input: `%s`\nException message",
-                                chat_id, expr, err)
+        except (DrawError, WorkerError) as err:
+            if preview_message is not None:
+                await Handler.bot.delete_message(chat_id, preview_message.message_id)
+            await message.reply(Handler._worker_error_message(err, user_language))
+            Handler.logger.info("%s exception raised on user's [chat_id=%s] input: `%s`\nException message: %s",
+                                type(err).__name__, chat_id, expr, err)
             return
 
-        output_message = _("Here a graph of requested functions")
-        await Handler.bot.send_photo(
-            chat_id=chat_id,
-            photo=image,
-            caption=output_message + '\n' + "\n".join(parser.warnings)
-        )
+        if preview_message is not None:
+            # Replace the preview with the full-quality image
+            sent = await Handler.bot.edit_message_media(types.InputMediaPhoto(media=image, caption=caption),
+                                                        chat_id=chat_id, message_id=preview_message.message_id)
+        else:
+            sent = await Handler.bot.send_photo(
+                chat_id=chat_id,
+                photo=image,
+                caption=caption
+            )
         image.close()
+        await Handler._save_file_id(fingerprint, sent)
 
         parser.clear_warnings()
 
@@ -300,33 +448,54 @@ class Handler:
                 Handler.logger.info("Bot doesn't find any pattern for user's [id=%s] input: `%s`", chat_id, expr)
                 return
 
-            result = await parser.process_query(user_language)
+            # If USE_LATEX set in True, then send picture to the user. Else, send basic text.
+            # The picture uploaded for the same request earlier is sent again without any calculations
+            use_latex = Handler.SETTINGS.properties["APP"]["USE_LATEX"]
+            fingerprint = parser.fingerprint(user_language)
+            if use_latex and await Handler._send_saved_photo(chat_id, fingerprint, "\n".join(parser.warnings)):
+                parser.clear_warnings()
+                return
 
-            # If USE_LATEX set in True, then send picture to the user. Else, send basic text
-            if Handler.SETTINGS.properties["APP"]["USE_LATEX"]:
-                latex = parser.make_latex(result)
-                with BytesIO() as latex_picture, BytesIO() as resized_image:
-                    await run_TeX(latex, latex_picture)
-                    await resize_image(latex_picture, resized_image)
+            # The results of the same requests are cached, a hit skips the calculation and rendering
+            kind = "image" if use_latex else "text"
+            exact = True
+            if (cached := await Handler.result_cache.get(fingerprint, kind)) is None:
+                result, exact = await Handler._calculate_with_deadline(parser, user_language, chat_id)
+                if use_latex:
+                    latex = parser.make_latex(result)
+                    with BytesIO() as latex_picture, BytesIO() as resized_image:
+                        await run_TeX(latex, latex_picture)
+                        await resize_image(latex_picture, resized_image)
+                        cached = resized_image.getvalue()
+                else:
+                    cached = str(result).encode("utf-8")
+                if exact:
+                    await Handler.result_cache.put(fingerprint, kind, cached)
+            Handler.logger.debug("Result cache: %s", Handler.result_cache.stats)
 
-                    # If we can't send photo due to Telegram limitations, then send image as file instead
-                    try:
-                        await Handler.bot.send_photo(
+            if use_latex:
+                # If we can't send photo due to Telegram limitations, then send image as file instead
+                try:
+                    with BytesIO(cached) as image:
+                        sent = await Handler.bot.send_photo(
                             chat_id=chat_id,
-                            photo=resized_image,
+                            photo=image,
                             caption="\n".join(parser.warnings)
                         )
-                    except telegram.error.BadRequest:
-                        parser.push_warning(_("Photo size is too large, therefore I send you a file."))
+                    if exact:
+                        await Handler._save_file_id(fingerprint, sent)
+                except telegram.error.BadRequest:
+                    parser.push_warning(_("Photo size is too large, therefore I send you a file."))
+                    with BytesIO(cached) as image:
                         await Handler.bot.send_document(
                             chat_id=chat_id,
-                            document=resized_image,
+                            document=image,
                             caption="\n".join(parser.warnings)
                         )
             else:
                 await Handler.bot.send_message(
                     chat_id=chat_id,
-                    text=str(result)
+                    text=cached.decode("utf-8")
                 )
             parser.clear_warnings()
         except ParseError as err:
@@ -337,6 +506,10 @@ class Handler:
             await message.reply(_(str(err)))
             Handler.logger.info("MathError exception raised on user's [chat_id=%s] input: `%s`\nException message: %s",
                                 chat_id, expr, err)
+        except WorkerError as err:
+            await message.reply(Handler._worker_error_message(err, user_language))
+            Handler.logger.warning("%s exception raised on user's [chat_id=%s] input: `%s`\nException message: %s",
+                                   type(err).__name__, chat_id, expr, err)
         except RecursionError as err:
             await message.reply(_("Incorrect input. Please check your function."))
             Handler.logger.warning(
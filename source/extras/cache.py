@@ -0,0 +1,221 @@
+"""
+Caches of computed results (e.g. rendered images)
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+
+def fingerprint(data) -> str:
+    """
+    Build a canonical fingerprint of JSON-serializable data
+    :param data: dictionary, list or other JSON-serializable object
+    :return: hexadecimal sha256 hash of the data
+    """
+    dump = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(dump.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    In-memory cache of byte strings. When the total size of the values exceeds the budget,
+    the least recently used values are evicted
+
+    :param max_bytes: the budget of the cache in bytes
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key: str):
+        return key in self._items
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Get value from the cache and mark it as recently used
+        :param key: key of the value
+        :return: the value or None if there is no such key
+        """
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key: str, value: bytes):
+        """
+        Put the value into the cache. Values that are larger than the budget are not stored
+        :param key: key of the value
+        :param value: byte string to store
+        """
+        if key in self._items:
+            self.size -= len(self._items.pop(key))
+        if len(value) > self.max_bytes:
+            return
+
+        self._items[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class RenderCache:
+    """
+    Two-tier cache of rendered images: the in-memory LRU tier and the on-disk tier that survives restarts.
+    Both tiers have a byte budget
+
+    :param memory_limit: the budget of the in-memory tier in bytes
+    :param disk_limit: the budget of the on-disk tier in bytes
+    :param directory: the directory for the on-disk tier
+    """
+
+    def __init__(self, memory_limit: int, disk_limit: int, directory: str | Path):
+        self.memory = LRUCache(memory_limit)
+        self.disk_limit = disk_limit
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        # Files on the disk from the least recently used to the most recently used one
+        entries = sorted(os.scandir(self.directory), key=lambda entry: entry.stat().st_mtime)
+        self._files = OrderedDict((entry.name, entry.stat().st_size) for entry in entries if entry.is_file())
+        self._disk_size = sum(self._files.values())
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Get the image from the memory or from the disk
+        :param key: fingerprint of the image
+        :return: image bytes or None if the image is not cached
+        """
+        if (value := self.memory.get(key)) is not None:
+            self.memory_hits += 1
+            return value
+
+        if key in self._files:
+            try:
+                value = self._path(key).read_bytes()
+                os.utime(self._path(key))
+            except OSError:
+                self._forget_file(key)
+            else:
+                self._files.move_to_end(key)
+                self.memory.put(key, value)
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: bytes):
+        """
+        Save the image in both tiers
+        :param key: fingerprint of the image
+        :param value: image bytes
+        """
+        self.memory.put(key, value)
+        if len(value) > self.disk_limit:
+            return
+
+        try:
+            self._path(key).write_bytes(value)
+        except OSError:
+            return
+        self._forget_file(key)
+        self._files[key] = len(value)
+        self._disk_size += len(value)
+
+        while self._disk_size > self.disk_limit:
+            name = next(iter(self._files))
+            self._forget_file(name)
+            self._path(name).unlink(missing_ok=True)
+
+    def _forget_file(self, key: str):
+        if key in self._files:
+            self._disk_size -= self._files.pop(key)
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: hit and miss counters of the cache
+        """
+        requests = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory hits": self.memory_hits,
+            "disk hits": self.disk_hits,
+            "misses": self.misses,
+            "hit ratio": (self.memory_hits + self.disk_hits) / requests if requests else 0.0
+        }
+
+
+class ResultCache:
+    """
+    Two-tier cache of analysis results: the in-memory LRU tier and the persistent tier in the database,
+    which survives restarts and is shared by all instances of the bot. Each result is cached in several kinds
+    (e.g. the rendered image and the text), the kinds are stored separately
+
+    :param memory_limit: the budget of the in-memory tier in bytes
+    :param storage: the persistent tier, an object with asynchronous 'get_result' and 'save_result' methods
+        (see MongoDatabase). If it is None, then only the in-memory tier is used
+    """
+
+    def __init__(self, memory_limit: int, storage=None):
+        self.memory = LRUCache(memory_limit)
+        self.storage = storage
+        self.memory_hits = 0
+        self.storage_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str, kind: str) -> bytes | None:
+        """
+        Get the result from the memory or from the database
+        :param key: fingerprint of the request
+        :param kind: kind of the result (e.g. 'image' or 'text')
+        :return: the result or None if it is not cached
+        """
+        if (value := self.memory.get(f"{kind}:{key}")) is not None:
+            self.memory_hits += 1
+            return value
+
+        if self.storage is not None and (value := await self.storage.get_result(key, kind)) is not None:
+            self.memory.put(f"{kind}:{key}", value)
+            self.storage_hits += 1
+            return value
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, kind: str, value: bytes):
+        """
+        Save the result in both tiers
+        :param key: fingerprint of the request
+        :param kind: kind of the result (e.g. 'image' or 'text')
+        :param value: the result
+        """
+        self.memory.put(f"{kind}:{key}", value)
+        if self.storage is not None:
+            await self.storage.save_result(key, kind, value)
+
+    @property
+    def stats(self) -> dict:
+        """
+        :return: hit and miss counters of the cache
+        """
+        requests = self.memory_hits + self.storage_hits + self.misses
+        return {
+            "memory hits": self.memory_hits,
+            "storage hits": self.storage_hits,
+            "misses": self.misses,
+            "hit ratio": (self.memory_hits + self.storage_hits) / requests if requests else 0.0
+        }
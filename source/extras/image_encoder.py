@@ -0,0 +1,117 @@
+"""
+Encoder of rendered images. It fits images into the given size and byte budget
+"""
+import time
+from io import BytesIO
+
+import numpy as np
+from matplotlib.figure import Figure
+from PIL import Image
+
+# Fast octree quantization method of Pillow (the constant name differs between Pillow versions)
+FAST_OCTREE = 2
+
+# Lossy formats are encoded with decreasing quality until the image fits, but not with less than this value
+MIN_QUALITY = 40
+QUALITY_STEP = 15
+
+# If the image doesn't fit even with the lowest quality, it is downscaled by this factor
+SCALE_STEP = 0.75
+MIN_SIDE = 64
+
+
+class EncodedImage:
+    """
+    This class represents encoded image and the statistics of encoding
+
+    :param data: encoded image bytes
+    :param image_format: format of the image (png, webp or jpeg)
+    :param size: width and height of the image in pixels
+    :param encode_time: time spent on rasterization and encoding in seconds
+    """
+
+    def __init__(self, data: bytes, image_format: str, size: tuple, encode_time: float):
+        self.data = data
+        self.image_format = image_format
+        self.size = size
+        self.encode_time = encode_time
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def file_name(self) -> str:
+        """
+        :return: file name with an extension corresponding to the format
+        """
+        return f"graph.{self.image_format}"
+
+
+def figure_to_image(figure: Figure, dpi: float) -> Image.Image:
+    """
+    Rasterize the figure
+    :param figure: matplotlib figure with Agg canvas
+    :param dpi: dots per inch
+    :return: RGB image
+    """
+    figure.set_dpi(dpi)
+    figure.canvas.draw()
+    return Image.fromarray(np.asarray(figure.canvas.buffer_rgba())).convert("RGB")
+
+
+def _save(image: Image.Image, image_format: str, quality: int) -> bytes:
+    buf = BytesIO()
+    match image_format:
+        case "png":
+            image.quantize(colors=256, method=FAST_OCTREE).save(buf, format="PNG", optimize=False)
+        case "webp":
+            image.save(buf, format="WEBP", quality=quality, method=4)
+        case "jpeg":
+            image.save(buf, format="JPEG", quality=quality, optimize=False)
+        case _:
+            raise ValueError(f"Unsupported image format: {image_format}")
+    return buf.getvalue()
+
+
+def encode_image(image: Image.Image, image_format: str = "png", max_side: int = 2560, max_bytes: int = 5 * 2 ** 20,
+                 quality: int = 90) -> EncodedImage:
+    """
+    Encode the image so that it fits in the size and byte budgets.
+    The quality is stepped down first (for lossy formats), then the resolution
+    :param image: image to encode
+    :param image_format: png (with palette quantization), webp or jpeg
+    :param max_side: the maximum width and height of the image in pixels
+    :param max_bytes: the budget of the encoded image in bytes
+    :param quality: initial quality for lossy formats
+    :return: encoded image
+    """
+    start = time.perf_counter()
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    qualities = [quality] if image_format == "png" else list(range(quality, MIN_QUALITY - 1, -QUALITY_STEP))
+    while True:
+        for current_quality in qualities:
+            data = _save(image, image_format, current_quality)
+            if len(data) <= max_bytes:
+                return EncodedImage(data, image_format, image.size, time.perf_counter() - start)
+
+        # Don't make the image unreadable, better send it as it is
+        new_size = (int(image.width * SCALE_STEP), int(image.height * SCALE_STEP))
+        if min(new_size) < MIN_SIDE:
+            return EncodedImage(data, image_format, image.size, time.perf_counter() - start)
+        image = image.resize(new_size, Image.LANCZOS)
+
+
+def encode_figure(figure: Figure, dpi: float, image_format: str = "png", max_side: int = 2560,
+                  max_bytes: int = 5 * 2 ** 20, quality: int = 90) -> EncodedImage:
+    """
+    Rasterize and encode the figure (see encode_image for the parameters)
+    :param figure: matplotlib figure with Agg canvas
+    :param dpi: dots per inch
+    :return: encoded image
+    """
+    start = time.perf_counter()
+    image = encode_image(figure_to_image(figure, dpi), image_format, max_side, max_bytes, quality)
+    image.encode_time = time.perf_counter() - start
+    return image
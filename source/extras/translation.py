@@ -83,4 +83,5 @@ try to understand you:
 - Minimum
 - Critical points
 - Monotonicity
+- Full study (all of the above)
 """)]
@@ -0,0 +1,178 @@
+"""
+Pool of worker processes with per-job wall-clock and CPU time limits
+"""
+import asyncio
+import math
+import multiprocessing
+import queue
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows doesn't support resource limits, only the wall-clock limit is applied there
+    resource = None
+
+# Signal that the system sends to the process that exceeded its CPU time limit
+SIGXCPU = getattr(signal, "SIGXCPU", None)
+
+
+class WorkerError(Exception):
+    """This exception is raised when a worker process unexpectedly dies while doing a job"""
+
+
+class JobTimeoutError(WorkerError):
+    """This exception is raised when a job exceeds its wall-clock or CPU time limit"""
+
+
+def _set_cpu_limit(seconds: float):
+    """
+    Limit the CPU time of the current process so that it is killed after spending given seconds more
+    :param seconds: CPU time available for the next job
+    """
+    if resource is None or not seconds:
+        return
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_loop(connection, initializer, cpu_time_limit: float):
+    """
+    Main function of a worker process. It receives jobs from the pipe and sends back their results
+    :param connection: the worker end of the pipe
+    :param initializer: function that is called once when the worker starts (or None)
+    :param cpu_time_limit: CPU time limit of every job in seconds (0 means no limit)
+    """
+    if initializer is not None:
+        initializer()
+
+    while True:
+        try:
+            func, args = connection.recv()
+        except EOFError:
+            return
+
+        _set_cpu_limit(cpu_time_limit)
+        try:
+            response = (True, func(*args))
+        except Exception as err:  # pylint: disable=broad-except
+            response = (False, err)
+
+        try:
+            connection.send(response)
+        except Exception as err:  # pylint: disable=broad-except
+            # The result (or the exception) can't be pickled
+            connection.send((False, WorkerError(f"Can't send the result of the job: {err}")))
+
+
+class _Worker:
+    """
+    Worker process and the parent end of its pipe
+    """
+
+    def __init__(self, context, initializer, cpu_time_limit: float):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_loop, args=(child_connection, initializer, cpu_time_limit),
+                                       daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def kill(self):
+        """
+        Kill the process and close the pipe
+        """
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class WorkerPool:
+    """
+    This class runs jobs in the separate processes. Unlike ProcessPoolExecutor, a job that exceeds its
+    wall-clock or CPU time limit is interrupted: the worker is killed and replaced by a new one, so bad inputs
+    don't hold the worker slots forever
+
+    :param processes: the number of worker processes (0 means one per CPU)
+    :param wall_time_limit: the wall-clock time limit of every job in seconds (0 means no limit)
+    :param cpu_time_limit: the CPU time limit of every job in seconds (0 means no limit).
+        It is not applied on the platforms without resource limits (e.g. Windows)
+    :param initializer: function that is called in every worker process when it starts
+    """
+
+    def __init__(self, processes: int, wall_time_limit: float, cpu_time_limit: float, initializer=None):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.wall_time_limit = wall_time_limit
+        self.cpu_time_limit = cpu_time_limit
+        self.initializer = initializer
+        self._context = multiprocessing.get_context("spawn")
+
+        # Every thread waits for the result of one job, so the number of concurrent jobs equals the number of workers
+        self._threads = ThreadPoolExecutor(max_workers=self.processes)
+        self._idle = queue.SimpleQueue()
+        for _ in range(self.processes):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context, self.initializer, self.cpu_time_limit)
+
+    def _execute(self, func, args: tuple, wall_time_limit: float):
+        """
+        Run the job in an idle worker and wait for its result
+        :param func: picklable function to call
+        :param args: picklable arguments of the function
+        :param wall_time_limit: the wall-clock time limit of the job in seconds (0 means no limit)
+        :return: the result of the function
+        """
+        worker = self._idle.get()
+        try:
+            worker.connection.send((func, args))
+            if not worker.connection.poll(wall_time_limit or None):
+                worker.kill()
+                worker = self._spawn()
+                raise JobTimeoutError(f"The job exceeded the wall-clock limit of {wall_time_limit} s")
+
+            try:
+                success, result = worker.connection.recv()
+            except EOFError as err:
+                worker.process.join(1)
+                exitcode = worker.process.exitcode
+                worker.kill()
+                worker = self._spawn()
+                if SIGXCPU is not None and exitcode == -SIGXCPU:
+                    raise JobTimeoutError(f"The job exceeded the CPU limit of {self.cpu_time_limit} s") from err
+                raise WorkerError(f"The worker died with exit code {exitcode}") from err
+        finally:
+            self._idle.put(worker)
+
+        if not success:
+            raise result
+        return result
+
+    async def run(self, func, *args, wall_time_limit: float = None):
+        """
+        Asynchronously run the function in a worker process
+        :param func: picklable function to call (e.g. a module-level function or a static method)
+        :param args: picklable arguments of the function
+        :param wall_time_limit: the wall-clock time limit of this job, the limit of the pool by default.
+            It can't be greater than the limit of the pool
+        :return: the result of the function. Exceptions raised by the function are raised here as well
+        :raise JobTimeoutError: if the job exceeded the time limit
+        :raise WorkerError: if the worker died while doing the job
+        """
+        if wall_time_limit is None or (self.wall_time_limit and wall_time_limit > self.wall_time_limit):
+            wall_time_limit = self.wall_time_limit
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._threads, self._execute, func, args, wall_time_limit)
+
+    def shutdown(self):
+        """
+        Kill all idle workers. The pool must not be used after this call
+        """
+        self._threads.shutdown(wait=True)
+        while not self._idle.empty():
+            self._idle.get().kill()
@@ -1,18 +1,61 @@
 """
 Parser for function analysis requests
 """
+import asyncio
 import re
 from tokenize import TokenError
 
 import sympy as sy
 from sympy import SympifyError
-from sympy.parsing.sympy_parser import standard_transformations, implicit_multiplication_application, convert_xor
 
 from source.conf import Config
+from source.conf.patterns import PatternRegistry
+from source.extras.cache import fingerprint
 from source.extras.translation import _
 from source.extras.utilities import run_asynchronously
-from source.math.math_function import MathFunction, replace_incorrect_functions
-from source.math.parser import Parser, ParseError
+from source.extras.workers import JobTimeoutError, WorkerPool
+from source.math.complexity import ComplexityError
+from source.math.math_function import MathFunction
+from source.math.numeric import NumericAnalysis, NumericResult
+from source.math.parser import Parser, ParseError, ParsedToken
+
+
+# Actions that are calculated numerically when the symbolic calculation fails
+NUMERIC_ACTIONS = {
+    "zeros": NumericAnalysis.zeros,
+    "range": NumericAnalysis.range,
+    "maximum": NumericAnalysis.maximum,
+    "minimum": NumericAnalysis.minimum,
+    "stationary points": NumericAnalysis.stationary_points
+}
+
+
+# Actions of the full study of the function. They don't depend on each other, so they are calculated in parallel
+STUDY_ACTIONS = ("domain", "range", "zeros", "axes_intersection", "derivative", "stationary points", "monotonicity",
+                 "maximum", "minimum", "convexity", "concavity", "continuity", "periodicity", "evenness", "oddness",
+                 "vertical asymptotes", "horizontal asymptotes", "slant asymptotes")
+
+
+def _axes_symbols(symbols: list) -> list:
+    """
+    :param symbols: variables of the function
+    :return: two variables for the intersection with axes. If there is only one variable, then another one is predicted
+    """
+    if len(symbols) != 1:
+        return symbols
+    return [symbols[0], sy.Symbol("x") if str(symbols[0]) == "y" else sy.Symbol("y")]
+
+
+def _is_unsolved(action: str, result) -> bool:
+    """
+    Check if sympy couldn't calculate the result, but returned it without an exception
+    :param action: pattern set of the request
+    :param result: the first result of the calculation
+    :return: true if the result is a condition set or the extremum is not found
+    """
+    if action in ("maximum", "minimum") and result is sy.EmptySet:
+        return True
+    return isinstance(result, sy.Basic) and result.has(sy.ConditionSet)
 
 
 def _process_function(token: str, lang: str = "en") -> sy.Function:
@@ -22,31 +65,24 @@ def _process_function(token: str, lang: str = "en") -> sy.Function:
     :param token: string to convert
     :return: sympy simplified function object
     """
-    # Fix all incorrect functions in string representation of function
-    token = replace_incorrect_functions(token)
-    expr_parts = token.split('=')
-    parts_count = len(expr_parts)
-    rules = standard_transformations + (implicit_multiplication_application, convert_xor)
     try:
-        if parts_count == 1:
-            function = sy.parse_expr(expr_parts[0], transformations=rules)
-        elif parts_count == 2:
-            # If expression like 'y = x', then discard left part, else construct expression "y - x = 0"
-            result = sy.Eq(sy.parse_expr(expr_parts[0], transformations=rules),
-                           sy.parse_expr(expr_parts[1], transformations=rules))
-            vars_intersection = result.lhs.free_symbols & result.rhs.free_symbols
-            if re.match("^y$", expr_parts[0].strip()) is not None and len(vars_intersection) == 0:
-                modified_expr = expr_parts[1]
-            else:
-                modified_expr = f"{expr_parts[0]} - ({expr_parts[1]})"
-
-            function = sy.parse_expr(modified_expr, transformations=rules)
-        else:
+        parsed = ParsedToken(token)
+        if len(parsed.parts) > ParsedToken.MAX_SIDES:
             raise ParseError(_("Mistake in implicit function: found more than 1 equal sign.\n"
                                "Your input: {}\n"
                                "Please, check your math formula.", locale=lang).format(token.strip()))
 
+        # If it is expressions like 1 = 1 or 1 = 0
+        if parsed.is_equation and (result := sy.Eq(*parsed.sides)) in (sy.true, sy.false):
+            raise ParseError(_("Result of expression '{}' is always {}", locale=lang).format(token, result))
+
+        # If expression like 'y = x', then discard left part, else construct expression "y - x = 0"
+        function = parsed.expression()
 
+    except ComplexityError as err:
+        raise ParseError(_("The expression is too complex.\nYour input: {}\n"
+                           "Please, simplify it or split it into several queries.",
+                           locale=lang).format(token.strip())) from err
     except (SympifyError, TypeError, ValueError, AttributeError, TokenError) as err:
         raise ParseError(_("Mistake in expression.\nYour input: {}\n"
                            "Please, check your math formula.", locale=lang).format(token.strip())) from err
@@ -69,6 +105,12 @@ class CalculusParser(Parser):
     :param additional_params: a list of additional information that can be used in calculating the result
     """
 
+    # The number of processes that calculate results (if it is zero, then the number of CPUs is used)
+    # and time limits of every request
+    WORKERS = Config().properties["WORKERS"]
+
+    _workers: WorkerPool = None
+
     def __init__(self, action: str = "", function: MathFunction = None, additional_params: list = None):
         super().__init__()
         if additional_params is None:
@@ -77,58 +119,57 @@ class CalculusParser(Parser):
         self.function = function
         self.additional_params = additional_params
 
-    def _find_pattern(self, query: str, pattern_dict: dict, try_predict: bool, lang: str = "en") -> bool:
+    def _find_pattern(self, query: str, registry: PatternRegistry, try_predict: bool, lang: str = "en") -> bool:
         """
         Tries to find pattern matching the given query
         :param lang:
         :param query: user input
-        :param pattern_dict: a dictionary of patterns
+        :param registry: registry of compiled patterns
         :param try_predict: if there is a need to correct the query and try to find pattern again
         :return: true if pattern was found, otherwise false
         """
-        for pattern_set in pattern_dict:
-            for pattern in pattern_dict[pattern_set]["patterns"]:
-                p = re.compile(pattern)
-
-                # Match pattern if we don't want to predict the correct pattern
-                match = None
-                if not try_predict:
-                    match = re.match(p, query)
+        # Match all patterns at once if we don't want to predict the correct pattern
+        found = None
+        if not try_predict:
+            found = registry.match(query)
 
-                # If we want to find correct pattern again, we need to fix wrong words in query
-                if try_predict and (fixed_query := self._fix_words(query, pattern_set, pattern_dict, lang)):
-                    match = re.match(p, fixed_query)
-
-                if match:
-                    # Pattern parameters consist of last part of expression. Expression is a function to process
-                    pattern_params = list(map(int, pattern_dict[pattern_set]["patterns"][pattern]))
-                    expression = match.group(pattern_params[0])
-
-                    # Extract the function from query and construct MathFunction
-                    function = _process_function(expression, lang)
-                    m_func = MathFunction(expression, function)
-                    symbols = sorted(list(m_func.simplified_expr.free_symbols), key=lambda x: str(x))
-
-                    # Check if listed variables are correct
-                    for var in symbols:
-                        if not str(var).isalpha() or not str(var).isascii():
-                            raise ParseError(_("Variables can only contain latin letters\nIncorrect variable: '{}'",
-                                               locale=lang).format(var))
-
-                    # If there is no variables, then we can't get the answer. In order to not getting errors,
-                    # we can append fictitious variable 'x'
-                    if len(symbols) == 0:
-                        symbols.append(sy.Symbol("x"))
-                    m_func.symbols = symbols
-
-                    # Set the parser variables
-                    self.action = pattern_set
-                    self.function = m_func
-                    self.additional_params = [match.group(param) for param in pattern_params[1:]]
-
-                    return True
-
-                self.clear_warnings()
+        # If we want to find correct pattern again, we need to fix wrong words in query for every pattern set
+        else:
+            for pattern_set in registry:
+                fixed_query, warnings = self._fix_words(query, pattern_set, registry, lang)
+                if fixed_query and (found := registry.match(fixed_query, pattern_set)):
+                    for warning in warnings:
+                        self.push_warning(warning)
+                    break
+
+        if found is not None:
+            # Pattern parameters consist of last part of expression. Expression is a function to process
+            match, pattern_params = found.match, found.params
+            expression = match.group(pattern_params[0])
+
+            # Extract the function from query and construct MathFunction
+            function = _process_function(expression, lang)
+            m_func = MathFunction(expression, function)
+            symbols = sorted(list(m_func.simplified_expr.free_symbols), key=lambda x: str(x))
+
+            # Check if listed variables are correct
+            for var in symbols:
+                if not str(var).isalpha() or not str(var).isascii():
+                    raise ParseError(_("Variables can only contain latin letters\nIncorrect variable: '{}'",
+                                       locale=lang).format(var))
+
+            # If there is no variables, then we can't get the answer. In order to not getting errors,
+            # we can append fictitious variable 'x'
+            if len(symbols) == 0:
+                symbols.append(sy.Symbol("x"))
+            m_func.symbols = symbols
+
+            # Set the parser variables
+            self.action = found.pattern_set
+            self.function = m_func
+            self.additional_params = [match.group(param) for param in pattern_params[1:]]
+
+            return True
 
         return False
 
@@ -140,7 +181,7 @@ class CalculusParser(Parser):
         """
         pattern_set = self.action
         function = sy.latex(self.function.simplified_expr)
-        symbols = list(map(sy.latex, self.function.symbols))
+        symbols = list(map(sy.latex, _axes_symbols(self.function.symbols)))
         first_result = sy.latex(expression[0])
         second_result = sy.latex(expression[1]) if len(expression) > 1 else None
         third_result = sy.latex(expression[2]) if len(expression) > 2 else None
@@ -169,6 +210,11 @@ class CalculusParser(Parser):
                     [__("Domain"), __("of"), function]
                 ) + NLC + first_result
 
+            case "continuity":
+                result = SPACE.join(
+                    [__("Continuity"), __("of"), function]
+                ) + NLC + first_result
+
             case "range":
                 result = SPACE.join(
                     [__("Range"), __("of"), function]
@@ -254,21 +300,145 @@ class CalculusParser(Parser):
                 result = SPACE.join(
                     [__("Monotonicity"), __("of"), function]
                 ) + NLC + first_result
+                # The intervals are omitted if they can't be given exactly
+                if second_result is not None:
+                    result += NL + __("Increases") + NLC + second_result + NL + __("Decreases") + NLC + third_result
 
             case "stationary points":
                 result = SPACE.join(
                     [__("Stationary"), __("points"), __("of"), function]
                 ) + NLC + first_result
 
+            case "study":
+                # The sheet of all properties, the properties that weren't calculated are marked
+                lines = [SPACE.join([__("Study"), __("of"), function]) + ":"]
+                for action, part in zip(STUDY_ACTIONS, expression):
+                    if part is None:
+                        part = [_("couldn't calculate")] * 3
+                    lines.append(CalculusParser(action, self.function).make_latex(part))
+                result = NL.join(lines)
+
             case _:
                 raise ParseError(_("Unknown pattern set: {}").format(pattern_set))
 
         return result
 
-    @run_asynchronously
-    def process_query(self, lang: str = "en") -> list:
+    def fingerprint(self, lang: str = "en") -> str:
+        """
+        Build a canonical fingerprint of the parsed request. Requests with equal fingerprints have the same results
+        :param lang: language of the result
+        :return: fingerprint as a string
+        """
+        return fingerprint({
+            "action": self.action,
+            "function": sy.srepr(self.function.simplified_expr),
+            "symbols": [str(symbol) for symbol in self.function.symbols],
+            "params": [param and param.strip() for param in self.additional_params],
+            "lang": lang
+        })
+
+    @staticmethod
+    def workers() -> WorkerPool:
+        """
+        Get the pool of processes that calculate results. The pool is created on the first call
+        :return: worker pool
         """
-        Tries to calculate the requested function
+        if CalculusParser._workers is None:
+            CalculusParser._workers = WorkerPool(CalculusParser.WORKERS["analysis_processes"],
+                                                 CalculusParser.WORKERS["wall_time_limit"],
+                                                 CalculusParser.WORKERS["cpu_time_limit"])
+        return CalculusParser._workers
+
+    async def process_query(self, lang: str = "en") -> list:
+        """
+        Asynchronously calculate the requested function in the worker process
+        :param lang:
+        :return: list of results
+        :raise JobTimeoutError: if the calculation takes longer than the time limit
+        """
+        if self.action == "study":
+            return await self._process_study(lang)
+        return await CalculusParser.workers().run(self.calculate, lang)
+
+    async def _process_study(self, lang: str = "en") -> list:
+        """
+        Asynchronously calculate all properties of the function (see STUDY_ACTIONS) in worker processes.
+        The intermediate results shared by the properties (domain, period, derivative) are calculated
+        by one worker beforehand and sent to the others with the function. The properties run in parallel
+        on at most WORKERS["study_processes"] workers at once (by default all analysis workers, so the study
+        takes about as long as its slowest properties), and the study stops at WORKERS["study_time_limit"]
+        seconds: the running jobs are interrupted at the deadline and the properties that aren't calculated
+        by then are skipped
+        :param lang:
+        :return: list of results of every property, None if the property couldn't be calculated
+        """
+        workers = CalculusParser.workers()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CalculusParser.WORKERS["study_time_limit"]
+        semaphore = asyncio.Semaphore(CalculusParser.WORKERS["study_processes"])
+
+        async def run(func, *args):
+            async with semaphore:
+                if (remaining := deadline - loop.time()) <= 0:
+                    raise JobTimeoutError("The study exceeded its time limit")
+                return await workers.run(func, *args, wall_time_limit=remaining)
+
+        try:
+            function = await run(self.function.warm_up)
+        except Exception:  # pylint: disable=broad-except
+            # Every property will report its own error
+            function = self.function
+
+        parts = [CalculusParser(action, function) for action in STUDY_ACTIONS]
+        results = await asyncio.gather(*(run(part.calculate, lang) for part in parts), return_exceptions=True)
+        return [None if isinstance(result, BaseException) else result for result in results]
+
+    async def process_numeric(self, lang: str = "en") -> list | None:
+        """
+        Asynchronously calculate the approximate result in the worker process
+        :param lang:
+        :return: see calculate_numeric
+        :raise JobTimeoutError: if the calculation takes longer than the time limit
+        """
+        return await CalculusParser.workers().run(self.calculate_numeric, lang)
+
+    def calculate_numeric(self, lang: str = "en") -> list | None:
+        """
+        Calculate the approximate result of the request numerically (see NumericAnalysis)
+        :param lang:
+        :return: list with the labelled result or None if the request can't be calculated numerically
+        """
+        if self.action not in NUMERIC_ACTIONS or len(self.function.symbols) != 1:
+            return None
+
+        try:
+            value = NUMERIC_ACTIONS[self.action](self.function.context(self.function.symbols[0]).numeric)
+        except (ValueError, TypeError, ArithmeticError):
+            return None
+
+        return [NumericResult(value, _("numeric approximation", locale=lang))]
+
+    def calculate(self, lang: str = "en") -> list:
+        """
+        Tries to calculate the requested function. If sympy fails to find zeros, extrema, range
+        or stationary points, then they are calculated numerically
+        :param lang:
+        :return: list of results
+        """
+        try:
+            result = self._calculate(lang)
+        except (ValueError, NotImplementedError):
+            if (numeric := self.calculate_numeric(lang)) is None:
+                raise
+            return numeric
+
+        if self.action in NUMERIC_ACTIONS and _is_unsolved(self.action, result[0]):
+            return self.calculate_numeric(lang) or result
+        return result
+
+    def _calculate(self, lang: str = "en") -> list:
+        """
+        Calculate the requested function symbolically
         :param lang:
         :return: list of results
         """
@@ -298,6 +468,9 @@ class CalculusParser(Parser):
             case "domain":
                 result.append(m_func.domain(symbols[0]))
 
+            case "continuity":
+                result.append(m_func.continuity(symbols[0]))
+
             case "range":
                 result.append(m_func.frange(symbols[0]))
 
@@ -305,14 +478,7 @@ class CalculusParser(Parser):
                 result.append(m_func.zeros())
 
             case "axes_intersection":
-                # If there is only one variable, then we should predict another one
-                if len(symbols) == 1:
-                    first_variable = symbols[0]
-                    if str(first_variable) == "y":
-                        symbols.append(sy.Symbol("x"))
-                    else:
-                        symbols.append(sy.Symbol("y"))
-
+                symbols = _axes_symbols(symbols)
                 result.append(m_func.axis_intersection(symbols[0], symbols[1]))
                 result.append(m_func.axis_intersection(symbols[1], symbols[0]))
 
@@ -357,7 +523,7 @@ class CalculusParser(Parser):
                 result.append(m_func.minimum(symbols[0]))
 
             case "monotonicity":
-                result.append(m_func.monotonicity(symbols[0], lang))
+                result.extend(m_func.monotonicity(symbols[0], lang))
 
             case "stationary points":
                 result.append(m_func.stationary_points(symbols[0]))
@@ -374,17 +540,17 @@ class CalculusParser(Parser):
         :param query: user input, string (e.g. diff of x**2 by x)
         :return: true on successfully found pattern, false otherwise
         """
-        pattern_dict = Config.analysis_patterns
+        registry = Config.analysis_registry
 
         # Check if input match any pattern
         try:
-            if self._find_pattern(query, pattern_dict, False, lang):
+            if self._find_pattern(query, registry, False, lang):
                 return True
         except ParseError as err:
             # Maybe we should correct some words here. If nothing was changed, then we throw previous exception
-            if self._find_pattern(query, pattern_dict, True, lang):
+            if self._find_pattern(query, registry, True, lang):
                 return True
             raise err
 
         # If none of patterns were satisfied, then we can try to correct input and match the patterns again
-        return self._find_pattern(query, pattern_dict, True, lang)
+        return self._find_pattern(query, registry, True, lang)
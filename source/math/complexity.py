@@ -0,0 +1,210 @@
+"""
+Limits on the complexity of user expressions
+"""
+import ast
+import builtins
+import math
+import operator
+import types
+
+import sympy as sy
+
+from source.conf import Config
+
+# Names available in the expressions, the same as in sympy.parse_expr by default
+SYMPY_NAMESPACE = {name: getattr(sy, name) for name in sy.__all__} | \
+                  {name: obj for name, obj in vars(builtins).items() if isinstance(obj, types.BuiltinFunctionType)} | \
+                  {"max": sy.Max, "min": sy.Min}
+
+# Calls of these classes in the code of sympy parser are literals
+LITERALS = {"Integer", "Float", "Symbol", "Function"}
+
+# Functions that are written as 'n!' and 'n!!'
+FACTORIALS = {"factorial", "factorial2"}
+
+# Operations that are evaluated to check the powers
+OPERATIONS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+              ast.Pow: operator.pow}
+
+
+class ComplexityError(Exception):
+    """This exception is raised when the expression exceeds one of the limits"""
+
+
+def _log10(value: int | float) -> float:
+    """
+    :return: decimal logarithm of the absolute value, or zero for zero
+    """
+    return abs(math.log10(abs(value))) if value else 0.0
+
+
+def numeric_value(expression: sy.Basic) -> int | float | None:
+    """
+    :param expression: sympy expression
+    :return: python number if the expression is a real number, None otherwise
+    """
+    if expression.is_Integer:
+        return int(expression)
+    if expression.is_Number and expression.is_extended_real:
+        return float(expression)
+
+    return None
+
+
+class ExpressionBudget:
+    """
+    This class counts nodes of the expression tree while the tree is walked or built, and raises ComplexityError
+    as soon as one of the limits is exceeded, so the expression is rejected before sympy evaluates it.
+    Limits:
+    - max_nodes : the number of numbers, symbols, operations and function calls
+    - max_depth : nesting of the operations and function calls (a chain of sums or products is one level)
+    - max_exponent : the absolute value of a numeric exponent and the number of digits of a numeric power
+      or factorial (other fast-growing functions, e.g. gamma, are not checked)
+    - max_literal_digits : the number of digits of a number
+
+    :param limits: dictionary of the limits, EXPRESSION_LIMITS section of the config by default
+    """
+
+    LIMITS = Config().properties["EXPRESSION_LIMITS"]
+
+    def __init__(self, limits: dict = None):
+        limits = limits or self.LIMITS
+        self.max_nodes = limits["max_nodes"]
+        self.max_depth = limits["max_depth"]
+        self.max_exponent = limits["max_exponent"]
+        self.max_literal_digits = limits["max_literal_digits"]
+        self.nodes = 0
+
+    def node(self, depth: int):
+        """
+        Count one node of the tree
+        :param depth: depth of the node, the root is at depth 1
+        """
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise ComplexityError(f"More than {self.max_nodes} nodes")
+        if depth > self.max_depth:
+            raise ComplexityError(f"Nesting is deeper than {self.max_depth}")
+
+    def literal(self, text: str):
+        """
+        Check the number written in the expression
+        :param text: the number as it is written
+        """
+        if sum(char.isdigit() for char in text) > self.max_literal_digits:
+            raise ComplexityError(f"Number {text[:10]}... has more than {self.max_literal_digits} digits")
+
+    def power(self, base: int | float | None, exponent: int | float | None):
+        """
+        Check the power before it is evaluated
+        :param base: value of the base if it is a number
+        :param exponent: value of the exponent if it is a number
+        """
+        if exponent is None:
+            return
+        if abs(exponent) > self.max_exponent:
+            raise ComplexityError(f"Exponent {exponent} is greater than {self.max_exponent}")
+        if base is not None and abs(exponent) * _log10(base) > self.max_exponent:
+            raise ComplexityError(f"Power with exponent {exponent} has more than {self.max_exponent} digits")
+
+    def factorial(self, value: int | float | None):
+        """
+        Check the factorial before it is evaluated. The double factorial n!! is checked as n!, which is greater
+        :param value: value of the operand if it is a number
+        """
+        if value is not None and math.lgamma(abs(value) + 1) / math.log(10) > self.max_exponent:
+            raise ComplexityError(f"Factorial of {value} has more than {self.max_exponent} digits")
+
+    def check_code(self, code: str):
+        """
+        Walk the python code produced by sympy parser (see sympy.parsing.sympy_parser.stringify_expr)
+        without evaluating it
+        :param code: code of the expression
+        """
+        self._walk(ast.parse(code, mode="eval").body, 1)
+
+    def _walk(self, node: ast.expr, depth: int) -> int | float | None:
+        """
+        Count the node and its children
+        :param node: node of the syntax tree
+        :param depth: depth of the node
+        :return: value of the node if it is a real number
+        """
+        self.node(depth)
+        value = None
+        match node:
+            case ast.Call(func=ast.Name(id=name), args=[ast.Constant(value=literal)]) if name in LITERALS:
+                value = self._literal_call(name, literal)
+
+            case ast.Call(func=ast.Name(id=name), args=[operand]) if name in FACTORIALS:
+                operand_value = self._walk(operand, depth + 1)
+                self.factorial(operand_value)
+                if name == "factorial" and isinstance(operand_value, int) and operand_value >= 0:
+                    value = math.factorial(operand_value)
+
+            case ast.Constant(value=int() | float() as number):
+                self.literal(str(number))
+                value = number
+
+            case ast.UnaryOp(op=op, operand=operand):
+                value = _unary(op, self._walk(operand, depth + 1))
+
+            case ast.BinOp(left=left, op=op, right=right):
+                # Sympy flattens sums and products, so the chain is not nested
+                chained = isinstance(left, ast.BinOp) and _operation_group(left.op) == _operation_group(op) != 0
+                left_value = self._walk(left, depth if chained else depth + 1)
+                right_value = self._walk(right, depth + 1)
+                if isinstance(op, ast.Pow):
+                    self.power(left_value, right_value)
+                if left_value is not None and right_value is not None:
+                    value = _evaluate(op, left_value, right_value)
+
+            case _:
+                for child in ast.iter_child_nodes(node):
+                    if isinstance(child, ast.expr):
+                        self._walk(child, depth + 1)
+
+        return value
+
+    def _literal_call(self, name: str, literal) -> int | float | None:
+        """
+        Check the number in the call of Integer or Float
+        :param name: name of the class
+        :param literal: argument of the call
+        :return: value of the number, None for symbols and functions
+        """
+        if name == "Integer":
+            self.literal(str(literal))
+            return int(literal)
+        if name == "Float":
+            self.literal(literal)
+            return float(literal)
+        return None
+
+
+def _unary(op: ast.unaryop, value: int | float | None) -> int | float | None:
+    if value is None or not isinstance(op, (ast.USub, ast.UAdd)):
+        return None
+    return -value if isinstance(op, ast.USub) else value
+
+
+def _operation_group(op: ast.operator) -> int:
+    if isinstance(op, (ast.Add, ast.Sub)):
+        return 1
+    if isinstance(op, (ast.Mult, ast.Div)):
+        return 2
+    return 0
+
+
+def _evaluate(op: ast.operator, left: int | float, right: int | float) -> int | float | None:
+    # The values are used only to check the powers, so an overflow is infinity
+    operation = OPERATIONS.get(type(op))
+    try:
+        result = operation(left, right) if operation else None
+    except OverflowError:
+        result = float("inf")
+    except (ZeroDivisionError, ValueError):
+        result = None
+
+    # The power of a negative number with a fractional exponent is complex
+    return result if isinstance(result, (int, float)) else None
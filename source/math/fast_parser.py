@@ -0,0 +1,265 @@
+"""
+Fast parser for the common grammar of user expressions
+"""
+import keyword
+import re
+import unicodedata
+
+import sympy as sy
+
+from source.math.complexity import ExpressionBudget, SYMPY_NAMESPACE, numeric_value
+from source.math.math_function import FUNCTION_ALIASES
+
+# Functions that can be called with parentheses or applied to the next term (e.g. 'sin x')
+FUNCTIONS = {name: getattr(sy, name) for name in ("sin", "cos", "tan", "cot", "sec", "csc",
+                                                  "asin", "acos", "atan", "acot", "asec", "acsc",
+                                                  "sinh", "cosh", "tanh", "coth", "sech", "csch",
+                                                  "asinh", "acosh", "atanh", "acoth",
+                                                  "exp", "log", "ln", "sqrt", "cbrt", "root",
+                                                  "sign", "floor", "ceiling", "diff")}
+FUNCTIONS["abs"] = sy.Abs
+
+CONSTANTS = {"pi": sy.pi}
+
+TOKEN_PATTERN = re.compile(r" *(?:(?P<number>\d+(?:\.\d+)?)|(?P<name>[a-z]+)|(?P<op>\*\*|[-+*/^(),]))")
+
+# Characters that make python tokenizer read a number or a name in another way (e.g. '2e5', '2j', 'x2')
+NUMBER_SUFFIXES = set("ej._0123456789")
+NAME_SUFFIXES = set("_0123456789")
+
+# Binding powers of the operators
+SUM, PRODUCT, UNARY, POWER = 10, 20, 30, 40
+BINDING_POWERS = {"+": SUM, "-": SUM, "*": PRODUCT, "/": PRODUCT, "^": POWER, "**": POWER}
+
+
+class _Unsupported(Exception):
+    """This exception is raised when the expression should be parsed by sympy"""
+
+
+def _tokenize(text: str) -> list | None:
+    """
+    Split the string into numbers, names and operators
+    :param text: string to split
+    :return: list of tokens (kind, value) or None if the string contains anything else
+    """
+    tokens = []
+    position, end = 0, len(text.rstrip(" "))
+    while position < end:
+        if (match := TOKEN_PATTERN.match(text, position)) is None:
+            return None
+        position = match.end()
+        following = text[position:position + 1]
+
+        if (number := match.group("number")) is not None:
+            # Leading zeros, hexadecimal, exponent and imaginary literals are read by python in its own way
+            if following in NUMBER_SUFFIXES or (number[0] == "0" and number[1:2].isdigit()) or \
+                    (number == "0" and following in "xob"):
+                return None
+        elif match.group("name") is not None and following in NAME_SUFFIXES:
+            return None
+
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+
+    return tokens
+
+
+def _is_greek(name: str) -> bool:
+    # Sympy doesn't split the names of greek letters into symbols
+    try:
+        unicodedata.lookup("GREEK SMALL LETTER " + name)
+        return True
+    except KeyError:
+        return False
+
+
+class _PrattParser:
+    """
+    Top-down operator precedence parser. It reproduces what sympy does with the transformations of
+    source.math.parser.TRANSFORMATIONS: every operator is evaluated as in python, juxtaposition is multiplication,
+    unknown names are split into one-letter symbols and a function without parentheses is applied to the next
+    product of terms (e.g. 'sin 2x^2 y' is sin(2*x**2*y)). The function argument is not parenthesized by sympy
+    in some cases, such input raises _Unsupported. The nodes are counted by the budget before they are evaluated
+
+    :param tokens: list of tokens
+    :param budget: limits on the complexity of the expression
+    """
+
+    def __init__(self, tokens: list, budget: ExpressionBudget):
+        self.tokens = tokens
+        self.budget = budget
+        self.position = 0
+
+    def _peek(self) -> tuple:
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _next(self) -> tuple:
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _expect(self, value: str):
+        if self._next() != ("op", value):
+            raise _Unsupported()
+
+    def parse(self) -> sy.Basic:
+        """
+        :return: sympy expression
+        """
+        result = self._expression(0, False, 1)
+        if self.position != len(self.tokens):
+            raise _Unsupported()
+
+        return result
+
+    def _binding_power(self, argument: bool) -> int:
+        kind, value = self._peek()
+        if kind is None or value in (")", ","):
+            return 0
+
+        # Juxtaposition is multiplication
+        if kind != "op" or value == "(":
+            return PRODUCT
+
+        # Function argument without parentheses ends before these operators
+        if argument and value in ("+", "-", "/"):
+            return 0
+
+        return BINDING_POWERS[value]
+
+    def _expression(self, right_power: int, argument: bool, depth: int) -> sy.Basic:
+        """
+        Parse the expression while the operators bind stronger than the given power
+        :param right_power: binding power of the operator on the left
+        :param argument: whether it is an argument of a function without parentheses
+        :param depth: depth of the expression in the tree
+        :return: sympy expression
+        """
+        left = self._prefix(argument, depth)
+        while (power := self._binding_power(argument)) > right_power:
+            kind, value = self._peek()
+            if kind == "op" and value != "(":
+                self.position += 1
+            elif argument:
+                # Sympy doesn't include terms in parentheses in the argument
+                if value == "(":
+                    raise _Unsupported()
+                value = "*"
+            else:
+                value = "*"
+
+            self.budget.node(depth)
+            match value:
+                case "+":
+                    left = left + self._expression(SUM, argument, depth + 1)
+                case "-":
+                    left = left - self._expression(SUM, argument, depth + 1)
+                case "*":
+                    left = left * self._expression(PRODUCT, argument, depth + 1)
+                case "/":
+                    left = left / self._expression(PRODUCT, argument, depth + 1)
+                case _:
+                    # Power is right associative
+                    right = self._expression(power - 1, argument, depth + 1)
+                    self.budget.power(numeric_value(left), numeric_value(right))
+                    left = left ** right
+
+        return left
+
+    def _prefix(self, argument: bool, depth: int) -> sy.Basic:
+        """
+        Parse the term with its prefix operators
+        :param argument: whether it is an argument of a function without parentheses
+        :param depth: depth of the term in the tree
+        :return: sympy expression
+        """
+        kind, value = self._next()
+        match kind:
+            case "number":
+                self.budget.literal(value)
+                self.budget.node(depth)
+                return sy.Float(value) if "." in value else sy.Integer(value)
+            case "name":
+                self.budget.node(depth)
+                return self._name(value, argument, depth)
+            case "op" if value in ("+", "-") and not argument:
+                self.budget.node(depth)
+                operand = self._expression(UNARY, argument, depth + 1)
+                return -operand if value == "-" else +operand
+            case "op" if value == "(" and not argument:
+                result = self._expression(0, False, depth)
+                self._expect(")")
+                return result
+
+        raise _Unsupported()
+
+    def _name(self, name: str, argument: bool, depth: int) -> sy.Basic:
+        """
+        Parse the function, constant or symbol
+        :param name: name of the term
+        :param argument: whether it is an argument of a function without parentheses
+        :param depth: depth of the term in the tree
+        :return: sympy expression
+        """
+        name = FUNCTION_ALIASES.get(name, name)
+
+        if name in FUNCTIONS:
+            return self._function(FUNCTIONS[name], argument, depth)
+
+        if name in CONSTANTS:
+            # Sympy closes the argument of a function before '**' that follows a constant
+            if argument and self._peek() == ("op", "**"):
+                raise _Unsupported()
+            return CONSTANTS[name]
+
+        if name in SYMPY_NAMESPACE or keyword.iskeyword(name):
+            raise _Unsupported()
+
+        # Unknown names are products of one-letter symbols
+        if len(name) > 1 and not _is_greek(name):
+            self.tokens[self.position - 1:self.position] = [("name", letter) for letter in name]
+            name = name[0]
+
+        return sy.Symbol(name)
+
+    def _function(self, function, argument: bool, depth: int) -> sy.Basic:
+        """
+        Parse the function call with or without parentheses
+        :param function: sympy function
+        :param argument: whether it is an argument of a function without parentheses
+        :param depth: depth of the call in the tree
+        :return: sympy expression
+        """
+        kind, value = self._peek()
+        if (kind, value) == ("op", "("):
+            self.position += 1
+            args = [self._expression(0, False, depth + 1)]
+            while self._peek() == ("op", ","):
+                self.position += 1
+                args.append(self._expression(0, False, depth + 1))
+            self._expect(")")
+            return function(*args)
+
+        # Sympy doesn't handle functions without parentheses in the argument of another one
+        if kind is None or kind == "op" or argument:
+            raise _Unsupported()
+
+        return function(self._expression(0, True, depth + 1))
+
+
+def parse(text: str, budget: ExpressionBudget = None) -> sy.Basic | None:
+    """
+    Parse the string into sympy expression in one pass. The result is the same as the result of
+    sympy.parse_expr(replace_incorrect_functions(text), transformations=TRANSFORMATIONS),
+    but only simple expressions (numbers, letters, common functions and arithmetic operators) are supported
+    :param text: string to parse
+    :param budget: limits on the complexity of the expression, see ExpressionBudget.
+        ComplexityError is raised if the expression exceeds them
+    :return: sympy expression or None if the string should be parsed by sympy
+    """
+    if not (tokens := _tokenize(text)):
+        return None
+
+    try:
+        return _PrattParser(tokens, budget or ExpressionBudget()).parse()
+    except (_Unsupported, TypeError, ValueError, ArithmeticError, AttributeError, RecursionError):
+        return None
@@ -0,0 +1,67 @@
+"""
+Pool of reusable Matplotlib figures
+"""
+import threading
+from contextlib import contextmanager
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+class FigurePool:
+    """
+    This class keeps pre-styled figures with axes between the requests. Taken figure is returned to the pool
+    with all artists removed, so the next request doesn't construct the figure and doesn't resolve its style again.
+    Figures use rcParams at the moment of their creation, therefore plot style must be set up before the first use
+
+    :param size: the maximum number of idle figures in the pool
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._figures = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _create() -> Figure:
+        figure = Figure()
+        FigureCanvasAgg(figure)
+        figure.add_subplot()
+        return figure
+
+    @staticmethod
+    def _clear(figure: Figure):
+        """
+        Remove everything that was drawn on the figure and reset axes parameters changed by the drawing
+        :param figure: figure to clear
+        """
+        ax = figure.axes[0]
+        for artist in [*ax.lines, *ax.collections, *ax.patches, *ax.texts, *ax.images]:
+            artist.remove()
+        if (legend := ax.get_legend()) is not None:
+            legend.remove()
+
+        ax.set_title("")
+        ax.set_prop_cycle(None)
+        ax.set_aspect("auto")
+        ax.relim()
+        ax.set_autoscale_on(True)
+
+    @contextmanager
+    def figure(self):
+        """
+        Take the figure from the pool (or create a new one if the pool is empty)
+        :return: context manager that yields the figure and its axes
+        """
+        with self._lock:
+            figure = self._figures.pop() if self._figures else None
+        if figure is None:
+            figure = self._create()
+
+        try:
+            yield figure, figure.axes[0]
+        finally:
+            self._clear(figure)
+            with self._lock:
+                if len(self._figures) < self.size:
+                    self._figures.append(figure)
@@ -1,16 +1,19 @@
 """
 Graph class module
 """
-from io import BytesIO
-
+import matplotlib
 import numpy as np
 import sympy as sy
-from matplotlib import pyplot as plt, style
+from matplotlib import style
 
 from source.conf.config import Config
+from source.extras.cache import fingerprint
+from source.extras.image_encoder import EncodedImage, encode_figure
 from source.extras.translation import _
-from source.extras.utilities import run_asynchronously
+from source.extras.workers import WorkerPool
+from source.math.figure_pool import FigurePool
 from source.math.graph_parser import GraphParser
+from source.math.plot_engine import draw_explicit, draw_implicit, set_axis_center
 
 
 class DrawError(Exception):
@@ -18,14 +21,32 @@ class DrawError(Exception):
 
 
 class Graph:
-    """This class represents plot of one or multiple functions"""
+    """
+    This class represents plot of one or multiple functions.
+    Plots are drawn in the separate processes, each of them builds its own figures without pyplot global state
+    """
 
-    # This variable adjusts the accuracy of the implicit function drawing
-    # Increase it to get more antialiasing result
+    # This variable limits the number of grid nodes along each axis for the implicit function drawing
+    # Increase it to get more accurate result
     IMPLICIT_FUNCTION_POINTS = Config().properties["PLOT_APPEARANCE"]["STYLE"]["implicit_function_points"]
 
-    def __init__(self):
-        self.plot = sy.plot(show=False, title=_("Plot"), legend=True)
+    # The number of points at which explicit functions are evaluated
+    EXPLICIT_FUNCTION_POINTS = Config().properties["PLOT_APPEARANCE"]["STYLE"]["explicit_function_points"]
+
+    # Resolution (dots per inch), size, format and byte budget of the output image
+    OUTPUT = Config().properties["IMAGE_OUTPUT"]
+
+    # Resolution and the number of points of the quick low-quality plot sent before the full-quality one
+    PREVIEW = Config().properties["PREVIEW"]
+
+    # The number of processes that draw plots (if it is zero, then the number of CPUs is used)
+    # and time limits of every plot
+    WORKERS = Config().properties["WORKERS"]
+
+    _workers: WorkerPool = None
+
+    # Every process keeps its own figures between the requests
+    _figure_pool = FigurePool(2)
 
     @staticmethod
     def setup_plot_style():
@@ -36,10 +57,60 @@ class Graph:
         style.use(parameters["STYLE"]["style"])
 
         for param, value in parameters["RC_PARAMS"].items():
-            plt.rcParams[param] = value
+            matplotlib.rcParams[param] = value
 
-    @run_asynchronously
-    def draw(self, tokens: dict, lang: str = "en") -> BytesIO:
+    @staticmethod
+    def workers() -> WorkerPool:
+        """
+        Get the pool of processes that draw plots. The pool is created on the first call
+        :return: worker pool
+        """
+        if Graph._workers is None:
+            Graph._workers = WorkerPool(Graph.WORKERS["render_processes"], Graph.WORKERS["wall_time_limit"],
+                                        Graph.WORKERS["cpu_time_limit"], initializer=Graph.setup_plot_style)
+        return Graph._workers
+
+    @staticmethod
+    def fingerprint(tokens: dict, lang: str = "en") -> str:
+        """
+        Build a canonical fingerprint of the plot. Plots with equal fingerprints are drawn as the same images
+        :param tokens: dict of parsed user input (see render function)
+        :param lang: language of the plot
+        :return: fingerprint as a string
+        """
+        return fingerprint({
+            "explicit": [sy.srepr(func.simplified_expr) for func in tokens["explicit"]],
+            "implicit": [sy.srepr(func.simplified_expr) for func in tokens["implicit"]],
+            "domain": tokens["domain"],
+            "range": tokens["range"],
+            "aspect ratio": tokens["aspect ratio"],
+            "lang": lang,
+            "style": Config().properties["PLOT_APPEARANCE"],
+            "output": Graph.OUTPUT
+        })
+
+    @staticmethod
+    def needs_preview(tokens: dict) -> bool:
+        """
+        Check if the plot is heavy enough to send its preview before the full-quality image
+        :param tokens: dict of parsed user input (see render function)
+        :return: True if the preview should be drawn
+        """
+        return Graph.PREVIEW["enabled"] and len(tokens["implicit"]) >= Graph.PREVIEW["min_implicit_functions"]
+
+    async def draw(self, tokens: dict, lang: str = "en", preview: bool = False) -> EncodedImage:
+        """
+        Asynchronously draw parsed functions in the process pool and save plot as image
+        :param tokens: dict of parsed user input (see render function)
+        :param lang:
+        :param preview: draw the low-resolution plot with fewer points (see PREVIEW section of the config)
+        :return: encoded image
+        :raise JobTimeoutError: if the plot is drawn longer than the time limit
+        """
+        return await Graph.workers().run(Graph.render, tokens, lang, preview)
+
+    @staticmethod
+    def render(tokens: dict, lang: str = "en", preview: bool = False) -> EncodedImage:
         """
         Draw parsed functions and save plot as image
 
@@ -54,7 +125,14 @@ class Graph:
             - 'explicit' : explicit functions like y = x
             - 'implicit' : implicit functions (it does not have to be truth function),
                for instance, x^2 + y^2 = 4;
+        :param preview: draw the low-resolution plot with fewer points (see PREVIEW section of the config)
+        :return: encoded image (see IMAGE_OUTPUT section of the config)
         """
+        settings = Graph.PREVIEW if preview else {
+            "dpi": Graph.OUTPUT["dpi"],
+            "explicit_function_points": Graph.EXPLICIT_FUNCTION_POINTS,
+            "implicit_function_points": Graph.IMPLICIT_FUNCTION_POINTS
+        }
 
         # We have to set domain and/or range due to functions are calculating in given intervals and if we don't
         # explicitly specify it, then later functions will be displayed cropped
@@ -67,76 +145,48 @@ class Graph:
         if len(domain := tokens["domain"]) != 2:
             domain = [-10, 10]
 
-        x, y = sy.symbols("x y")
-
-        # Extract all explicit functions
-        for func in tokens['explicit']:
-            self.plot.extend(sy.plot(func.simplified_expr,
-                                     (x, domain[0], domain[1]),
-                                     show=False,
-                                     label=f'${sy.latex(func.simplified_expr)}$'))
-
-        # Update plot parameters and y-limit for implicit functions
-        backend = self.plot.backend(self.plot)
-        try:
-            backend.process_series()
-        except (ZeroDivisionError, OverflowError, TypeError) as err:
-            raise DrawError(_("Unexpected error, check your expression.", locale=lang)) from err
-
-        # Extract all implicit functions
-        for impl_func in tokens['implicit']:
-            self.plot.extend(sy.plot_implicit(impl_func.simplified_expr,
-                                              (x, domain[0], domain[1]),
-                                              (y, rng[0], rng[1]),
-                                              adaptive=False,
-                                              points=self.IMPLICIT_FUNCTION_POINTS,
-                                              show=False,
-                                              line_color=list(np.random.rand(3))))
-
-            # Set label 'x = number' if it is expression like 'x = 1'
-            label = impl_func.simplified_expr
-            if GraphParser.is_x_equal_num_expression(impl_func.expression):
-                label = sy.Eq(impl_func.symbols[0], sy.solve(impl_func.simplified_expr)[0])
-
-            self.plot.extend(sy.plot(0,
-                                     label=f'${sy.latex(label)}$',
-                                     line_color='none',
-                                     show=False))
-
-        # Matplotlib does not see plots which were added by 'extend' method.
-        # Process_series force mpl process new graphs
-        backend = self.plot.backend(self.plot)
-        try:
-            backend.process_series()
-        except (ZeroDivisionError, OverflowError, TypeError) as err:
-            raise DrawError(_("Unexpected error, check your expression.", locale=lang)) from err
-
-        # Set function range
-        if len(rng := tokens["range"]) != 0:
-            plt.ylim(rng)
-
-        # Set function domain
-        if len(domain := tokens["domain"]) != 0:
-            plt.xlim(domain)
-
-        # Set aspect ratio
-        if len(ratio := tokens["aspect ratio"]) != 0:
-            backend.ax[0].set_aspect(ratio[0])
-
-        # Set colors on implicit functions in legend. I had to do it because Sympy don't want to
-        # add these functions in legend by itself.
-        # Print self.plot variable to understand why it is needed
-        legend = backend.ax[0].get_legend()
-        impl_func_count = len(tokens["implicit"])
-        expl_func_count = len(tokens["explicit"])
-        counter = 0
-        for i in range(expl_func_count, expl_func_count + 2 * impl_func_count, 2):
-            legend.legendHandles[expl_func_count + counter].set_color(self.plot[i].line_color)
-            counter += 1
-
-        buf = BytesIO()
-        backend.fig.savefig(buf, format="png", dpi=300, bbox_inches='tight')
-        buf.seek(0)
-        plt.close("all")
-
-        return buf
+        with Graph._figure_pool.figure() as (figure, ax):
+            ax.set_title(_("Plot", locale=lang))
+
+            try:
+                # Extract all explicit functions. They are evaluated on the dense grid in one vectorized call
+                for func in tokens['explicit']:
+                    draw_explicit(ax, func.simplified_expr, domain, settings["explicit_function_points"],
+                                  label=f'${sy.latex(func.simplified_expr)}$')
+
+                # Extract all implicit functions. The grid is not denser than the pixels of the output image
+                resolution = np.minimum(figure.get_size_inches() * settings["dpi"],
+                                        min(Graph.OUTPUT["max_side"], settings["implicit_function_points"])).astype(int)
+                for impl_func in tokens['implicit']:
+                    color = list(np.random.rand(3))
+                    draw_implicit(ax, impl_func.simplified_expr, domain, rng, resolution, color)
+
+                    # Set label 'x = number' if it is expression like 'x = 1'
+                    label = impl_func.simplified_expr
+                    if GraphParser.is_x_equal_num_expression(impl_func.expression):
+                        label = sy.Eq(impl_func.symbols[0], sy.solve(impl_func.simplified_expr)[0])
+
+                    # Line collections are not shown in the legend, so we add an empty line with the same color
+                    ax.plot([], [], label=f'${sy.latex(label)}$', color=color)
+            except (ZeroDivisionError, OverflowError, TypeError, ValueError) as err:
+                raise DrawError(_("Unexpected error, check your expression.", locale=lang)) from err
+
+            # Set function range
+            if len(rng := tokens["range"]) != 0:
+                ax.set_ylim(rng)
+
+            # Set function domain
+            if len(domain := tokens["domain"]) != 0:
+                ax.set_xlim(domain)
+
+            # Set aspect ratio
+            if len(ratio := tokens["aspect ratio"]) != 0:
+                ax.set_aspect(ratio[0])
+
+            set_axis_center(ax)
+            ax.legend()
+
+            image = encode_figure(figure, settings["dpi"], Graph.OUTPUT["format"], Graph.OUTPUT["max_side"],
+                                  Graph.OUTPUT["max_bytes"], Graph.OUTPUT["quality"])
+
+        return image
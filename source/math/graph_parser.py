@@ -6,13 +6,14 @@ from tokenize import TokenError
 
 import sympy as sy
 from sympy import SympifyError
-from sympy.parsing.sympy_parser import convert_xor, implicit_multiplication_application, standard_transformations
 
 from source.conf import Config
+from source.conf.patterns import PatternRegistry
 from source.extras.translation import _
 from source.extras.utilities import run_asynchronously
-from source.math.math_function import MathFunction, replace_incorrect_functions
-from source.math.parser import Parser, ParseError
+from source.math.complexity import ComplexityError
+from source.math.math_function import MathFunction
+from source.math.parser import Parser, ParseError, ParsedToken
 
 
 def _split_query(expr: str, lang: str = "en") -> list:
@@ -112,43 +113,41 @@ class GraphParser(Parser):
                                "Aspect ratio cannot be negative or equal to zero.", locale=lang).format(token.strip()))
         self.tokens[pattern_set] = [ratio]
 
-    def _find_pattern(self, pattern_dict: dict, token: str, try_predict: bool, lang: str = "en") -> bool:
+    def _find_pattern(self, registry: PatternRegistry, token: str, try_predict: bool, lang: str = "en") -> bool:
         """
         Tries to find suitable pattern for given token and apply it (change tokens)
         :param lang:
-        :param pattern_dict: dictionary of patterns
+        :param registry: registry of compiled patterns
         :param token: part of user input
         :param try_predict: if there is a need to fix query
         :return: true if the pattern was found, false otherwise
         """
-        for pattern_set in pattern_dict:
-            for pattern in pattern_dict[pattern_set]["patterns"]:
-                p = re.compile(pattern)
-
-                # Match pattern if we don't want to predict the correct pattern
-                match = None
-                if not try_predict:
-                    match = re.match(p, token)
-
-                # If we want to find correct pattern again, we need to fix wrong words in query
-                if try_predict and (fixed_query := self._fix_words(token, pattern_set, pattern_dict, lang)):
-                    match = re.match(p, fixed_query)
-
-                if match:
-                    # Pattern parameters consist of last part of expression. Expression is a function to process
-                    pattern_params = list(map(int, pattern_dict[pattern_set]["patterns"][pattern]))
-
-                    match pattern_set:
-                        case "domain":
-                            self._update_domain_range(match, pattern_params, pattern_set, token, lang)
-                        case "range":
-                            self._update_domain_range(match, pattern_params, pattern_set, token, lang)
-                        case "aspect ratio":
-                            self._update_aspect_ratio(match, pattern_params, pattern_set, token, lang)
-
-                    return True
-
-        return False
+        # Match all patterns at once if we don't want to predict the correct pattern
+        found = None
+        if not try_predict:
+            found = registry.match(token)
+
+        # If we want to find correct pattern again, we need to fix wrong words in query for every pattern set
+        else:
+            for pattern_set in registry:
+                fixed_query, warnings = self._fix_words(token, pattern_set, registry, lang)
+                if fixed_query and (found := registry.match(fixed_query, pattern_set)):
+                    for warning in warnings:
+                        self.push_warning(warning)
+                    break
+
+        if found is None:
+            return False
+
+        match found.pattern_set:
+            case "domain":
+                self._update_domain_range(found.match, found.params, found.pattern_set, token, lang)
+            case "range":
+                self._update_domain_range(found.match, found.params, found.pattern_set, token, lang)
+            case "aspect ratio":
+                self._update_aspect_ratio(found.match, found.params, found.pattern_set, token, lang)
+
+        return True
 
     def _process_variables(self, function: sy.Function, lang: str = "en") -> sy.Function:
         """
@@ -185,20 +184,17 @@ class GraphParser(Parser):
 
         return function
 
-    def _process_function(self, token: str, lang: str = "en") -> sy.Function:
+    def _process_function(self, token: str, lang: str = "en") -> tuple:
         """
-        Converting a string into a sympy function
+        Converting a string into a sympy function. The string is parsed only once
         :param lang:
         :param token: string to convert
-        :return: sympy simplified function object
+        :return: the parsed token, which is reused by later checks, and sympy simplified function object
         """
-        token = replace_incorrect_functions(token)
-        expr_parts = token.split('=')
-        parts_count = len(expr_parts)
-        rules = standard_transformations + (implicit_multiplication_application, convert_xor)
         try:
-            if parts_count == 1:
-                function = sy.parse_expr(expr_parts[0], transformations=rules)
+            parsed = ParsedToken(token)
+            if len(parsed.parts) == 1:
+                function = parsed.expression()
 
                 # If there is only 'y' variable, then we can't understand what we should draw, because it is impossible
                 # to change axes in plot in our case
@@ -207,10 +203,9 @@ class GraphParser(Parser):
                                        "There is only 'y' variable. It's f(y) or f(x) = 0?\n"
                                        "Please, use 'x' instead of single 'y' variable for f(x) plot.",
                                        locale=lang).format(token))
-            elif parts_count == 2:
+            elif parsed.is_equation:
                 # If parsed result always true or false (e.g. it is not a function at all)
-                result = sy.Eq(sy.parse_expr(expr_parts[0], transformations=rules),
-                               sy.parse_expr(expr_parts[1], transformations=rules))
+                result = sy.Eq(*parsed.sides)
 
                 # Check if number of variables is less than 2
                 if len(result.free_symbols) > 2:
@@ -226,14 +221,11 @@ class GraphParser(Parser):
                     raise ParseError(_("Result of expression '{}' is always {}", locale=lang).format(token, result))
 
                 # If expression like 'y = x', then discard left part, else construct expression "y - x = 0"
-                # or if expression is not like 'y = y ** 2' (same variables at the both sides)
-                vars_intersection = result.lhs.free_symbols & result.rhs.free_symbols
-                if re.match("^y$", expr_parts[0].strip()) is not None and len(vars_intersection) == 0:
-                    modified_expr = expr_parts[1]
-                    function = sy.parse_expr(modified_expr, transformations=rules)
-                else:
-                    modified_expr = f"{expr_parts[0]} - ({expr_parts[1]})"
-                    function = sy.Eq(sy.parse_expr(modified_expr, transformations=rules), 0)
+                # or if expression is not like 'y = y ** 2' (same variables at the both sides).
+                # The sides are already parsed, so the difference is built from them
+                function = parsed.expression()
+                if not parsed.is_y_definition:
+                    function = sy.Eq(function, 0)
 
             else:
                 raise ParseError(_("Mistake in implicit function: found more than 1 equal sign.\n"
@@ -242,6 +234,10 @@ class GraphParser(Parser):
 
             # Change variables
             function = self._process_variables(function, lang)
+        except ComplexityError as err:
+            raise ParseError(_("The expression is too complex.\nYour input: {}\n"
+                               "Please, simplify it or split it into several queries.",
+                               locale=lang).format(token.strip())) from err
         except (SympifyError, TypeError, ValueError, AttributeError, TokenError) as err:
             raise ParseError(_("Mistake in expression.\nYour input: {}\n"
                                "Please, check your math formula.", locale=lang).format(token.strip())) from err
@@ -250,7 +246,7 @@ class GraphParser(Parser):
                                "such as placing '*' (multiplication) signs and parentheses.",
                                locale=lang).format(token.strip())) from err
 
-        return function
+        return parsed, function
 
     @run_asynchronously
     def parse(self, query: str, lang: str = "en"):
@@ -262,7 +258,7 @@ class GraphParser(Parser):
         :param query: user input string to parse
         :return: true on successfully found patterns, false otherwise
         """
-        pattern_dict = Config.graph_patterns
+        registry = Config.graph_registry
 
         parts = _split_query(query, lang)
 
@@ -270,22 +266,22 @@ class GraphParser(Parser):
             token = token.strip()
 
             # Check if expression matches any pattern
-            if self._find_pattern(pattern_dict, token, False, lang):
+            if self._find_pattern(registry, token, False, lang):
                 continue
 
             # If it is a function
             try:
-                function = self._process_function(token, lang)
+                parsed, function = self._process_function(token, lang)
             except ParseError as err:
                 # If we don't found a pattern, and it is not a function, then try to fix words
-                if self._find_pattern(pattern_dict, token, True, lang):
+                if self._find_pattern(registry, token, True, lang):
                     continue
 
                 raise err
 
             # Next complex check finds expressions like "x = 1".
             # They should be implicit because of sympy specifics
-            is_x_equal_num = self.is_x_equal_num_expression(token)
+            is_x_equal_num = parsed.is_x_equal_num
 
             # Update tokens list
             variables_count = len(function.free_symbols)
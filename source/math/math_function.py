@@ -1,48 +1,411 @@
 """
 Math Function class module
 """
+import re
+from functools import cached_property
+from itertools import islice
 
 import sympy as sy
 import sympy.calculus.util as calculus
 from sympy.utilities.iterables import iterable
 
+from source.conf import Config
 from source.extras.translation import _
+from source.math.numeric import NumericAnalysis, disproves_identity
+
+
+class AliasRewriter:
+    """
+    Some functions in Sympy are named differently from what we are used to (e.g. tg -> tan, arcctg -> acot).
+    This class replaces all aliases in one pass of a single regular expression. Only whole names are replaced,
+    so 'tg' in 'ctg' or in 'xtg' is left alone, but a number can be written right before the name (e.g. '2tg x')
+
+    :param aliases: dictionary of our names and Sympy names
+    """
+
+    def __init__(self, aliases: dict):
+        self.aliases = aliases
+        self._pattern = None
+        if aliases:
+            # The longest alias is tried first
+            names = sorted(aliases, key=len, reverse=True)
+            self._pattern = re.compile(r"(?<![^\W\d])(?:" + "|".join(map(re.escape, names)) + r")(?!\w)")
+
+    def rewrite(self, text: str) -> str:
+        """
+        :param text: a string representation of a function
+        :return: the string with Sympy names of the functions
+        """
+        if self._pattern is None:
+            return text
+
+        return self._pattern.sub(lambda match: self.aliases[match.group()], text)
+
+
+# Our names of the functions and their Sympy names
+FUNCTION_ALIASES = Config().properties["FUNCTION_ALIASES"]
+
+ALIAS_REWRITER = AliasRewriter(FUNCTION_ALIASES)
 
 
 def replace_incorrect_functions(function: str) -> str:
     """
-    Some functions in Sympy are named differently from what we are used to
-    Our interpretation -> Sympy view:
-    tg -> tan
-    ctg -> cot
-    arcsin -> asin
-    arccos -> acos
-    arctg -> atan
-    arcctg -> acot
+    Replace our names of the functions with Sympy names (see FUNCTION_ALIASES), e.g. tg -> tan, arcctg -> acot
     :param function: a string representation of a function
     :return: function with replacements applied
     """
-    replacements = {
-        "arcsin": "asin",
-        "arccos": "acos",
-        "arctg": "atan",
-        "arctan": "atan",
-        "arcctg": "acot",
-        "arccot": "acot",
-        "ctg": "cot",
-        "tg": "tan"
-    }
-    result = function
-    for key, value in replacements.items():
-        result = result.replace(key, value)
-
-    return result
+    return ALIAS_REWRITER.rewrite(function)
+
+
+# Simplifications that are tried to prove an identity, from the cheapest to the most expensive one
+IDENTITY_SIMPLIFICATIONS = (sy.expand, sy.cancel, sy.trigsimp, sy.simplify)
+
+
+def _is_identity(left: sy.Expr, right: sy.Expr) -> bool:
+    """
+    Check if two expressions are identically equal. The numeric check disproves most of the false identities at once,
+    the rest are confirmed by the chain of simplifications of the difference that stops at the first zero
+    :param left: sympy expression
+    :param right: sympy expression
+    :return: true if the expressions are equal
+    """
+    if left == right:
+        return True
+    if disproves_identity(left, right):
+        return False
+
+    difference = left - right
+    return any(simplification(difference) == 0 for simplification in IDENTITY_SIMPLIFICATIONS)
+
+
+def _inner_point(start: sy.Expr, end: sy.Expr) -> sy.Expr:
+    """
+    :return: a point inside the interval between start and end (they can be infinite)
+    """
+    if start.is_infinite and end.is_infinite:
+        return sy.S.Zero
+    if start.is_infinite:
+        return end - 1
+    if end.is_infinite:
+        return start + 1
+    return (start + end) / 2
+
+
+def _is_intervals(value: sy.Set) -> bool:
+    """
+    :return: true if the set is an interval, a union of intervals or empty
+    """
+    if isinstance(value, sy.Union):
+        return all(isinstance(part, sy.Interval) for part in value.args)
+    return isinstance(value, sy.Interval) or value is sy.EmptySet
 
 
 class MathError(Exception):
     """Special exception for custom mathematical errors handling"""
 
 
+class AnalysisContext:
+    """
+    This class holds intermediate results of the function analysis with respect to one symbol.
+    Each result (domain, period, derivative, stationary points, limits) is calculated on the first access
+    and reused by all methods of MathFunction, so multi-part actions (e.g. 'asymptotes') share the work
+
+    :param function: sympy expression of the function
+    :param symbol: the argument of the function
+    """
+
+    # Maximum number of stationary points that are calculated for the range, maximum and minimum
+    CRIT_POINTS_LIMIT = 100
+
+    def __init__(self, function: sy.Expr, symbol: sy.Symbol):
+        self.function = function
+        self.symbol = symbol
+        self._limits = {}
+
+    @cached_property
+    def domain(self) -> sy.Set:
+        """
+        :return: the real domain where the function is continuous
+        """
+        return calculus.continuous_domain(self.function, self.symbol, sy.S.Reals)
+
+    @cached_property
+    def period(self) -> sy.Expr | None:
+        """
+        :return: see return of the 'periodicity' function
+        """
+        return calculus.periodicity(self.function, self.symbol)
+
+    @cached_property
+    def derivative(self) -> sy.Expr:
+        """
+        :return: the derivative of the function by the symbol
+        """
+        return sy.diff(self.function, self.symbol)
+
+    @cached_property
+    def stationary_points(self) -> sy.Set:
+        """
+        :return: set of the points in the domain where the derivative is zero
+        """
+        return sy.solveset(self.derivative, self.symbol, self.domain)
+
+    @cached_property
+    def critical_points(self) -> list | None:
+        """
+        Stationary point oracle. The domain (one period of a periodic function) is split into the intervals
+        where the function is continuous, and the stationary points are found for each of them. Infinite sets
+        of points are rejected by their structure (ImageSet), the rest are enumerated lazily up to CRIT_POINTS_LIMIT.
+        It fixes the infinite loop when Sympy calculates stationary points of aperiodic function
+        :return: list of pairs (interval, set of its stationary points) or None if the points can't be found
+            or there are too many of them
+        """
+        period = self.period
+        if period == sy.S.Zero:
+            # the expression is constant wrt symbol
+            return []
+
+        if period is None:
+            # The stationary points are shared with other analyses, they are distributed among the intervals
+            intervals = self.domain
+            stationary_points = self._bounded_points(self.stationary_points)
+            if stationary_points is None:
+                return None
+
+            def solve(interval: sy.Interval) -> list:
+                return [point for point in stationary_points if interval.contains(point) == sy.true]
+        else:
+            intervals = calculus.continuous_domain(self.function, self.symbol, sy.Interval(0, period))
+
+            def solve(interval: sy.Interval) -> list | None:
+                return self._bounded_points(sy.solveset(self.derivative, self.symbol, interval))
+
+        if isinstance(intervals, (sy.Interval, sy.FiniteSet)):
+            interval_iter = (intervals,)
+        elif isinstance(intervals, sy.Union):
+            interval_iter = intervals.args
+        else:
+            return None
+
+        result = []
+        for interval in interval_iter:
+            if isinstance(interval, sy.Interval):
+                if (points := solve(interval)) is None:
+                    return None
+                result.append((interval, sy.FiniteSet(*points)))
+            elif isinstance(interval, sy.FiniteSet):
+                result.append((interval, sy.EmptySet))
+        return result
+
+    def _bounded_points(self, solution: sy.Set) -> list | None:
+        """
+        :param solution: set of the stationary points
+        :return: list of the points or None if the set is infinite (or has more than CRIT_POINTS_LIMIT points)
+        """
+        if not iterable(solution) or solution.has(sy.ImageSet):
+            return None
+        points = list(islice(solution, self.CRIT_POINTS_LIMIT + 1))
+        return points if len(points) <= self.CRIT_POINTS_LIMIT else None
+
+    @cached_property
+    def range(self) -> sy.Set | None:
+        """
+        The value range like in calculus.function_range, but the stationary points are taken from the oracle
+        (see critical_points) and the limits are shared with the asymptotes
+        :return: the value range or None if the stationary points can't be found
+        """
+        if (critical_points := self.critical_points) is None:
+            return None
+        if self.period == sy.S.Zero:
+            return sy.FiniteSet(self.function.expand())
+
+        result = sy.EmptySet
+        for interval, points in critical_points:
+            if isinstance(interval, sy.FiniteSet):
+                result += sy.FiniteSet(*(self.function.subs(self.symbol, point) for point in interval))
+                continue
+
+            values = sy.EmptySet
+            limits = sy.EmptySet
+            for is_open, point, direction in ((interval.left_open, interval.inf, "+"),
+                                              (interval.right_open, interval.sup, "-")):
+                if is_open:
+                    limits += sy.FiniteSet(self.limit(self.function, point, direction))
+                    values += limits
+                else:
+                    values += sy.FiniteSet(self.function.subs(self.symbol, point))
+
+            for point in points:
+                values += sy.FiniteSet(self.function.subs(self.symbol, point))
+
+            # The value range is open where the function only approaches its bound
+            left_open = limits is not sy.EmptySet and limits.inf == values.inf
+            right_open = limits is not sy.EmptySet and limits.sup == values.sup
+            result += sy.Interval(values.inf, values.sup, left_open, right_open)
+
+        return result
+
+    @cached_property
+    def real_derivative(self) -> sy.Expr:
+        """
+        :return: the derivative of the function of real variable. Unlike derivative, it doesn't contain re and im
+            (e.g. it is sign(x) for Abs(x)), so its sign can be found
+        """
+        real = sy.Dummy(real=True)
+        return sy.diff(self.function.subs(self.symbol, real), real).subs(real, self.symbol)
+
+    @cached_property
+    def real_stationary_points(self) -> sy.Set:
+        """
+        :return: set of the points in the domain where the real derivative is zero (see stationary_points)
+        """
+        if self.real_derivative == self.derivative:
+            return self.stationary_points
+        return sy.solveset(self.real_derivative, self.symbol, self.domain)
+
+    @cached_property
+    def monotonicity(self) -> tuple:
+        """
+        Find where the function increases and decreases by the sign of the real derivative. If the domain can't be
+        split by the stationary points (e.g. there are infinitely many of them), the inequalities are solved instead.
+        The function is monotonic if the derivative doesn't change its sign on any part of the domain
+        (e.g. 1 / x is strictly decreasing), it is strictly monotonic if the derivative is zero only at single points
+        :return: type of monotonicity ('Strictly increasing', 'Increasing', 'Strictly decreasing', 'Decreasing'
+            or 'Non-monotonic'), the intervals of increase and the intervals of decrease. The intervals are None
+            if they can't be given exactly (e.g. the inequalities are solved only on one period)
+        """
+        if (intervals := self._sign_intervals()) is not None:
+            increasing, decreasing = intervals
+            strict = True
+        else:
+            increasing = sy.solveset(self.real_derivative > 0, self.symbol, self.domain)
+            decreasing = sy.solveset(self.real_derivative < 0, self.symbol, self.domain)
+            # The derivative is zero on some interval (e.g. of a constant function) or it is unknown where it is zero
+            strict = not self.real_stationary_points.has(sy.Interval)
+
+        if decreasing is sy.EmptySet:
+            kind = "Strictly increasing" if strict and increasing is not sy.EmptySet else "Increasing"
+        elif increasing is sy.EmptySet:
+            kind = "Strictly decreasing" if strict else "Decreasing"
+        else:
+            kind = "Non-monotonic"
+
+        if intervals is None and (not all(map(_is_intervals, (increasing, decreasing)))
+                                  or calculus.periodicity(self.real_derivative, self.symbol) is not None):
+            return kind, None, None
+        return kind, increasing, decreasing
+
+    def _sign_intervals(self) -> tuple | None:
+        """
+        Split the domain by the stationary points and the points where the derivative is undefined. The derivative
+        keeps its sign between them, so it is checked at one point of each interval. The ends of the intervals
+        where the function is continuous are included
+        :return: two sets: the intervals of increase and the intervals of decrease,
+            or None if the domain can't be split
+        """
+        if not _is_intervals(self.domain):
+            return None
+        points = self.real_stationary_points
+        if not isinstance(points, sy.FiniteSet) and points is not sy.EmptySet:
+            return None
+        parts = calculus.continuous_domain(self.real_derivative, self.symbol, self.domain)
+        if not _is_intervals(parts):
+            return None
+
+        increasing, decreasing = [], []
+        for part in (parts.args if isinstance(parts, sy.Union) else (parts,)):
+            inner = [point for point in points if sy.Interval.open(part.start, part.end).contains(point) == sy.true]
+            try:
+                bounds = [part.start, *sorted(inner, key=float), part.end]
+            except TypeError:
+                # The points depend on the parameters of the function
+                return None
+
+            for start, end in zip(bounds, bounds[1:]):
+                sign = sy.N(self.real_derivative.subs(self.symbol, _inner_point(start, end)))
+                if not sign.is_extended_real or sign.is_zero is not False:
+                    return None
+
+                left_open, right_open = (not bound.is_finite or self.domain.contains(bound) != sy.true
+                                         for bound in (start, end))
+                interval = sy.Interval(start, end, left_open, right_open)
+                (increasing if sign.is_positive else decreasing).append(interval)
+
+        return sy.Union(*increasing), sy.Union(*decreasing)
+
+    @cached_property
+    def numeric(self) -> NumericAnalysis:
+        """
+        :return: numeric analysis of the function, it is used when the symbolic one fails
+        """
+        return NumericAnalysis(self.function, self.symbol)
+
+    def limit(self, expression: sy.Expr, point: sy.Expr, direction: str = "+") -> sy.Expr:
+        """
+        Calculate the limit of the expression once
+        :param expression: the function or an expression built from it (e.g. f / x)
+        :param point: see 'limit' arguments
+        :param direction: see 'limit' arguments
+        :return: the limit
+        """
+        key = (expression, point, direction)
+        if key not in self._limits:
+            self._limits[key] = sy.limit(expression, self.symbol, point, direction)
+        return self._limits[key]
+
+    @cached_property
+    def lines_at_infinity(self) -> dict:
+        """
+        The lines y = kx + b that the function approaches at infinity (horizontal ones have k = 0).
+        A non-constant periodic function doesn't approach any line, so nothing is calculated for it
+        :return: dictionary {oo: (k, b), -oo: (k, b)}, the value is None if there is no line
+        """
+        if self.period is not None and self.period != sy.S.Zero:
+            return {sy.oo: None, -sy.oo: None}
+        return {point: self._line_at_infinity(point) for point in (sy.oo, -sy.oo)}
+
+    def _line_at_infinity(self, point: sy.Expr) -> tuple | None:
+        """
+        Find the leading terms of the function at infinity by one series expansion (see _leading_terms).
+        If it fails, they are the limits k = lim f / x and b = lim (f - kx)
+        :param point: oo or -oo
+        :return: pair (k, b) or None if the function doesn't approach a line
+        """
+        if (terms := self._leading_terms(point)) is not None:
+            return terms
+
+        k = self.limit(self.function / self.symbol, point)
+        if not (k.is_number and k.is_finite):
+            return None
+        b = self.limit(self.function - k * self.symbol, point)
+        if not (b.is_number and b.is_finite):
+            return None
+        return k, b
+
+    def _leading_terms(self, point: sy.Expr) -> tuple | None:
+        """
+        Expand t f(±1/t) into the series at zero. If the function approaches the line kx + b, the series is ±k + bt
+        up to the terms of higher order
+        :param point: oo or -oo
+        :return: pair (k, b) or None if the series has other terms (e.g. log(t)) or can't be calculated
+        """
+        t = sy.Dummy(positive=True)
+        sign = 1 if point == sy.oo else -1
+        try:
+            series = sy.series(self.function.subs(self.symbol, sign / t) * t, t, 0, 2).removeO()
+        except (ValueError, NotImplementedError, TypeError, ArithmeticError, sy.PoleError):
+            return None
+
+        constant, linear = series.coeff(t, 0), series.coeff(t, 1)
+        if sy.expand(series - constant - linear * t) != 0:
+            return None
+
+        k, b = sign * constant, linear
+        if not all(term.is_number and term.is_finite for term in (k, b)):
+            return None
+        return k, b
+
+
 class MathFunction:
     """
     This class represents a plot of function
@@ -63,58 +426,30 @@ class MathFunction:
         self.simplified_expr = simplified_expr
         self.func_type = func_type
         self.symbols = symbols
+        self._contexts = {}
 
     def __str__(self):
         return self.expression
 
-    @staticmethod
-    def _checkStationaryPoints(function: sy.Expr, symbol: sy.Symbol, domain: sy.Interval) -> bool:
+    def context(self, symbol: sy.Symbol) -> AnalysisContext:
         """
-        Fix bug fix infinite loop when Sympy calculates stationary points of aperiodic function.
-        Return false if function has more than CRIT_POINTS_LIMIT stationary points, true otherwise
+        Get the analysis context of the function with respect to the symbol. The context is created on the first call
+        :param symbol: the argument of the function ('x')
+        :return: analysis context that is shared by all methods of the function
         """
-        CRIT_POINTS_LIMIT = 100
-
-        period = sy.periodicity(function, symbol)
-        if period == sy.S.Zero:
-            # the expression is constant wrt symbol
-            return True
-
-        if period is not None:
-            if isinstance(domain, sy.Interval):
-                if (domain.inf - domain.sup).is_infinite:
-                    domain = sy.Interval(0, period)
-            elif isinstance(domain, sy.Union):
-                for sub_dom in domain.args:
-                    if isinstance(sub_dom, sy.Interval) and (sub_dom.inf - sub_dom.sup).is_infinite:
-                        domain = sy.Interval(0, period)
-
-        intervals = calculus.continuous_domain(function, symbol, domain)
-        if isinstance(intervals, (sy.Interval, sy.FiniteSet)):
-            interval_iter = (intervals,)
-        elif isinstance(intervals, sy.Union):
-            interval_iter = intervals.args
-        else:
-            return False
-
-        for interval in interval_iter:
-            if isinstance(interval, sy.Interval):
-                critical_points = sy.S.EmptySet
-                solution = sy.solveset(function.diff(symbol), symbol, interval)
+        if symbol not in self._contexts:
+            self._contexts[symbol] = AnalysisContext(self.simplified_expr, symbol)
+        return self._contexts[symbol]
 
-                if not iterable(solution):
-                    return False
-                if isinstance(solution, sy.ImageSet):
-                    return False
-
-                critical_points += solution
-
-                count = 0
-                for _ in critical_points:
-                    count += 1
-                    if count > CRIT_POINTS_LIMIT:
-                        return False
-        return True
+    def warm_up(self) -> "MathFunction":
+        """
+        Calculate the intermediate results that are shared by most analyses (domain, period and derivative)
+        :return: the function itself, so the results can be sent to other processes with it
+        """
+        context = self.context(self.symbols[0])
+        for result in ("domain", "period", "derivative"):
+            getattr(context, result)
+        return self
 
     def derivative(self, *symbols: sy.S) -> sy.Function:
         """
@@ -125,6 +460,8 @@ class MathFunction:
         diff_function = self.simplified_expr
 
         try:
+            if len(symbols) == 1:
+                return self.context(symbols[0]).derivative
             if len(symbols) == 0:
                 diff_function = sy.diff(self.simplified_expr)
             else:
@@ -143,7 +480,7 @@ class MathFunction:
         :param symbol: the symbol to find the definition (it is 'x' by default)
         :return: an interval the interval over which the function is defined
         """
-        return calculus.continuous_domain(self.simplified_expr, symbol, sy.S.Reals)
+        return self.context(symbol).domain
 
     def frange(self, symbol: sy.Symbol) -> sy.Interval:
         """
@@ -151,9 +488,9 @@ class MathFunction:
         :param symbol: the symbol to find the area (it is 'y' by default)
         :return: a value range (interval) of the function
         """
-        if not self._checkStationaryPoints(self.simplified_expr, symbol, sy.S.Reals):
+        if (result := self.context(symbol).range) is None:
             raise ValueError
-        return calculus.function_range(self.simplified_expr, symbol, sy.S.Reals)
+        return result
 
     def zeros(self) -> sy.Set:
         """
@@ -189,7 +526,7 @@ class MathFunction:
         :param symbol: see 'periodicity' arguments
         :return: see return of the 'periodicity' function
         """
-        result = calculus.periodicity(self.simplified_expr, symbol)
+        result = self.context(symbol).period
         if result is None:
             result = _("Aperiodic function")
         if result == 0:
@@ -217,63 +554,64 @@ class MathFunction:
         :return: an interval of continuity
         """
         # TODO unused function. For now
-        return calculus.continuous_domain(self.simplified_expr, symbol, sy.S.Reals)
+        return self.context(symbol).domain
 
-    def monotonicity(self, symbol: sy.Symbol, lang: str = "en") -> str:
+    def monotonicity(self, symbol: sy.Symbol, lang: str = "en") -> list:
         """
-        Determines the type of monotonicity of the function
+        Determines the type of monotonicity of the function and the intervals of increase and decrease
         :param lang:
         :param symbol: the argument of the function ('x')
-        :return: type of function as string
-        """
-        types = {
-            sy.is_strictly_decreasing: _("Strictly decreasing", locale=lang),
-            sy.is_strictly_increasing: _("Strictly increasing", locale=lang),
-            sy.is_increasing: _("Increasing", locale=lang),
-            sy.is_decreasing: _("Decreasing", locale=lang)
+        :return: type of function as string, the intervals of increase and the intervals of decrease
+            (only the type if the intervals can't be given exactly)
+        """
+        labels = {
+            "Strictly decreasing": _("Strictly decreasing", locale=lang),
+            "Strictly increasing": _("Strictly increasing", locale=lang),
+            "Increasing": _("Increasing", locale=lang),
+            "Decreasing": _("Decreasing", locale=lang),
+            "Non-monotonic": _("Non-monotonic", locale=lang)
         }
-        for func, value in types.items():
-            if func(self.simplified_expr, symbol=symbol):
-                return value
-        return _("Non-monotonic", locale=lang)
+        kind, increasing, decreasing = self.context(symbol).monotonicity
+        if increasing is None:
+            return [labels[kind]]
+        return [labels[kind], increasing, decreasing]
 
     def is_even(self, *symbols: sy.Symbol) -> bool:
         """
-        Determine if the function is even
+        Determine if the function is even. Most functions are not, so f(x) and f(-x) are compared at random points
+        first, and only the functions that pass the numeric check are simplified
         :param symbols: all function variables (just 'x').
         :return: true if the function is even, false otherwise
         """
-        function = sy.simplify(self.simplified_expr)
+        function = self.simplified_expr
         if len(function.free_symbols) == 0:
             return True
 
         x = symbols[0]
-        even_func = function.subs(x, -x)
-
-        return sy.simplify(even_func) == function
+        return _is_identity(function.subs(x, -x), function)
 
     def is_odd(self, *symbols: sy.Symbol) -> bool:
         """
-        Determine if the function is odd
+        Determine if the function is odd. Like in is_even, -f(x) and f(-x) are compared at random points first
         :param symbols: all function variables
         :return: true if the function is odd, false otherwise
         """
-        function = sy.simplify(self.simplified_expr)
-
         x = symbols[0]
         y = symbols[1] if len(symbols) > 1 else None
 
-        even_func = function.subs(x, -x)
-
         if y is not None:
+            function = sy.simplify(self.simplified_expr)
+            even_func = function.subs(x, -x)
             odd_func = function.subs(y, (-1) * y)
             return even_func in (odd_func, -odd_func)
 
-        return sy.simplify(even_func) == sy.simplify(-function)
+        function = self.simplified_expr
+        return _is_identity(function.subs(x, -x), -function)
 
     def _check_v_asymptote(self, symbol, point) -> bool:
-        left_limit = sy.limit(self.simplified_expr, symbol, point, '+')
-        right_limit = sy.limit(self.simplified_expr, symbol, point, '-')
+        context = self.context(symbol)
+        left_limit = context.limit(self.simplified_expr, point, '+')
+        right_limit = context.limit(self.simplified_expr, point, '-')
         return not point.is_infinite and (left_limit.is_infinite or right_limit.is_infinite)
 
     def vertical_asymptotes(self, symbol: sy.Symbol) -> set:
@@ -282,7 +620,7 @@ class MathFunction:
         :param symbol: the variable in relation to which the limits will be considered (x by default)
         :return: a set of answers (functions)
         """
-        exist = calculus.continuous_domain(self.simplified_expr, symbol, sy.S.Reals)
+        exist = self.context(symbol).domain
         not_exist = sy.S.Reals - exist
 
         if isinstance(not_exist, sy.sets.sets.Union):
@@ -302,7 +640,7 @@ class MathFunction:
                         ans.add(cur)
 
         # If function is periodic, we can't yet give an accurate answer
-        if calculus.periodicity(self.simplified_expr, symbol):
+        if self.context(symbol).period:
             # If the domain of function is some kind of "R \ {...}", than we can omit the part "R \"
             if isinstance(exist, sy.Complement):
                 ans.add(exist.args[1])
@@ -320,14 +658,7 @@ class MathFunction:
         :param symbol: the variable in relation to which the limits will be considered (x by default)
         :return: a set of answers (functions)
         """
-        pos_limit = sy.limit(self.simplified_expr, symbol, sy.oo)
-        neg_limit = sy.limit(self.simplified_expr, symbol, -sy.oo)
-        ans = set()
-
-        if pos_limit.is_number and pos_limit.is_finite:
-            ans.add(pos_limit)
-        if neg_limit.is_number and neg_limit.is_finite:
-            ans.add(neg_limit)
+        ans = {line[1] for line in self.context(symbol).lines_at_infinity.values() if line and line[0] == 0}
 
         if len(ans) == 0:
             ans.add(sy.EmptySet)
@@ -340,21 +671,7 @@ class MathFunction:
         :param symbol: the variable in relation to which the limits will be considered (x by default)
         :return: a set of answers (functions)
         """
-        ans = set()
-
-        # TODO periodic function
-
-        k = sy.limit(self.simplified_expr / symbol, symbol, sy.oo)
-        if k.is_number and k.is_finite:
-            b = sy.limit(self.simplified_expr - k * symbol, symbol, sy.oo)
-            if b.is_number and b.is_finite:
-                ans.add(k * symbol + b)
-
-        k = sy.limit(self.simplified_expr / symbol, symbol, -sy.oo)
-        if k.is_number and k.is_finite:
-            b = sy.limit(self.simplified_expr - k * symbol, symbol, -sy.oo)
-            if b.is_number and b.is_finite:
-                ans.add(k * symbol + b)
+        ans = {k * symbol + b for k, b in filter(None, self.context(symbol).lines_at_infinity.values())}
 
         # If given function is line, then it is its own asymptote, so we should remove it from set
         ans.discard(self.simplified_expr)
@@ -370,9 +687,7 @@ class MathFunction:
         :param symbol: see 'maximum' function args
         :return: a maximum value or empty set
         """
-        if not self._checkStationaryPoints(self.simplified_expr, symbol, sy.S.Reals):
-            raise ValueError
-        maximum = calculus.maximum(self.simplified_expr, symbol)
+        maximum = self.frange(symbol).sup
         if not maximum.is_infinite and not maximum.is_number:
             return sy.EmptySet
         return maximum
@@ -383,9 +698,7 @@ class MathFunction:
         :param symbol: see 'minimum' function args
         :return: a minimum value or empty set
         """
-        if not self._checkStationaryPoints(self.simplified_expr, symbol, sy.S.Reals):
-            raise ValueError
-        minimum = calculus.minimum(self.simplified_expr, symbol)
+        minimum = self.frange(symbol).inf
         if not minimum.is_infinite and not minimum.is_number:
             return sy.EmptySet
         return minimum
@@ -396,4 +709,4 @@ class MathFunction:
         :param symbol: see 'stationary_points' function args
         :return: a set of answers
         """
-        return calculus.stationary_points(self.simplified_expr, symbol)
+        return self.context(symbol).stationary_points
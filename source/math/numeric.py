@@ -0,0 +1,294 @@
+"""
+Numeric analysis of functions of one variable
+"""
+import numpy as np
+import sympy as sy
+
+from source.conf import Config
+from source.math.plot_engine import compile_function, evaluate
+
+# The number of bisection steps that refine every bracket. It is enough to reach the precision of floats
+BISECTION_STEPS = 64
+
+# The grid outside of the window is geometric and reaches window * OUTER_RATIO
+OUTER_RATIO = 1e6
+
+# A sign change is a root if the value in the refined bracket is less than this part of the values on its ends,
+# otherwise the function is discontinuous there (e.g. a pole of 1 / x)
+ROOT_TOLERANCE = 1e-6
+
+# Relative distances from a singular point at which the function is checked for unbounded growth
+PROBE_DISTANCES = (1e-4, 1e-8, 1e-12)
+
+# Points (in the units of the window) at which the function is checked for unbounded growth at infinity
+INFINITY_PROBES = (1e2, 1e4, OUTER_RATIO)
+
+# The number of significant digits of the approximate values
+PRECISION = 8
+
+# The number of random real and complex points at which the identities are checked
+IDENTITY_PROBES = 16
+
+# Two values are different if they differ by more than this part of the largest of them (or of one)
+IDENTITY_TOLERANCE = 1e-6
+
+
+def _grows_without_bound(values: np.ndarray) -> np.ndarray:
+    """
+    Check if the function is unbounded by its values at the points that approach the singular point (or infinity)
+    geometrically. The increments of a function that converges decrease geometrically too (e.g. atan(x) at infinity)
+    and the increments of an unbounded function don't (e.g. log(x) at zero)
+    :param values: values of the function at the points along the last axis, the closest point is the last one
+    :return: boolean array, true where the values tend to infinity
+    """
+    with np.errstate(invalid="ignore"):
+        magnitudes, increments = np.abs(values), np.abs(np.diff(values))
+        growing = np.all(np.diff(magnitudes) > 0, axis=-1) & (increments[..., -1] >= increments[..., 0] / 2)
+    return np.isinf(values[..., -1]) | (np.isfinite(values).all(axis=-1) & growing)
+
+
+def disproves_identity(left: sy.Expr, right: sy.Expr, seed: int = 0) -> bool:
+    """
+    Check numerically that two expressions are not identically equal. They are compared at random real points
+    and at random complex points off the real axis (so the values are not taken on the branch cuts of sqrt and log).
+    The points at which any of the expressions is undefined or can't be evaluated are skipped
+    :param left: sympy expression
+    :param right: sympy expression
+    :param seed: seed of the random points, the result is reproducible
+    :return: true if the expressions differ at some point, false if they may be equal
+    """
+    symbols = sorted(left.free_symbols | right.free_symbols, key=str)
+    generator = np.random.default_rng(seed)
+    size = (len(symbols), IDENTITY_PROBES)
+    real = generator.uniform(0.5, 3, size) * generator.choice([-1, 1], size)
+    imaginary = generator.uniform(0.5, 3, size) * generator.choice([-1, 1], size)
+
+    for points in (real, real + 1j * imaginary):
+        try:
+            with np.errstate(all="ignore"):
+                values = [np.broadcast_to(compile_function(expr, *symbols)(*points), IDENTITY_PROBES)
+                          for expr in (left, right)]
+        except (NameError, TypeError, ValueError, AttributeError, ZeroDivisionError, OverflowError):
+            # Some functions have no NumPy counterparts or don't support complex numbers (e.g. floor)
+            continue
+
+        first, second = (np.asarray(value, dtype=complex) for value in values)
+        defined = np.isfinite(first) & np.isfinite(second)
+        scale = np.maximum(1, np.maximum(np.abs(first), np.abs(second)))
+        if np.any(np.abs(first - second)[defined] > IDENTITY_TOLERANCE * scale[defined]):
+            return True
+
+    return False
+
+
+class NumericResult:
+    """
+    Approximate result of the numeric analysis. It is printed as the value with the label
+
+    :param value: sympy object
+    :param label: text that tells the user that the value is approximate
+    """
+
+    def __init__(self, value: sy.Basic, label: str):
+        self.value = value
+        self.label = label
+
+    def __str__(self):
+        return f"{self.value} ({self.label})"
+
+    def __eq__(self, other):
+        return isinstance(other, NumericResult) and (self.value, self.label) == (other.value, other.label)
+
+    def _latex(self, printer) -> str:
+        return printer.doprint(self.value) + r"\ " + printer.doprint(f"({self.label})")
+
+
+class NumericAnalysis:
+    """
+    Approximate analysis of a real function of one variable. The function and its derivative are compiled
+    with lambdify and sampled on the dense grid: the uniform grid on the window around zero and the geometric one
+    outside of it. The sign changes of the function (zeros) and of its derivative (stationary points)
+    are bracketed by the neighbouring points and refined by the vectorized bisection.
+    The sign changes at which the function is discontinuous, and the ends of the domain are checked
+    for unbounded growth, so the poles give infinite extrema.
+    The time is bounded by the number of points and does not depend on the function
+
+    :param function: sympy expression
+    :param symbol: the argument of the function
+    :param params: parameters of the grid, NUMERIC_ANALYSIS section of the config by default
+    """
+
+    PARAMS = Config().properties["NUMERIC_ANALYSIS"]
+
+    def __init__(self, function: sy.Expr, symbol: sy.Symbol, params: dict = None):
+        params = params or self.PARAMS
+        if function.free_symbols - {symbol}:
+            raise ValueError("Numeric analysis supports only functions of one variable")
+
+        self.window = params["window"]
+        self.max_points = params["max_points"]
+
+        # The derivative of the function of real variable doesn't contain re and im (e.g. it is sign(x) for Abs(x))
+        real = sy.Dummy(real=True)
+        real_function = function.subs(symbol, real)
+        self._function = compile_function(real_function, real)
+        self._derivative = compile_function(sy.diff(real_function, real), real)
+
+        inner = np.linspace(-self.window, self.window, params["points"])
+        outer = np.geomspace(self.window, self.window * OUTER_RATIO, params["points"] // 10)[1:]
+        self.xs = np.concatenate([-outer[::-1], inner, outer])
+        try:
+            self.ys = self._evaluate(self.xs)
+            self.dys = evaluate(self._derivative, self.xs)
+        except (NameError, TypeError) as err:
+            # Some sympy functions have no NumPy counterparts
+            raise ValueError(f"Function {function} can't be evaluated numerically") from err
+
+        self._roots, function_jumps = self._refine(self._function, self.ys)
+        self._stationary, derivative_jumps = self._refine(self._derivative, self.dys)
+        self._jumps = np.concatenate([function_jumps, derivative_jumps])
+        self._singular = np.concatenate([self._jumps, self._domain_ends()])
+
+    def _evaluate(self, xs: np.ndarray) -> np.ndarray:
+        return evaluate(self._function, xs, keep_infinite=True)
+
+    def _refine(self, func, values: np.ndarray) -> tuple:
+        """
+        Find the points where the values change their sign and refine them
+        :param func: compiled function
+        :param values: values of the function on the grid
+        :return: two arrays: sorted roots of the function and points where it changes the sign discontinuously
+        """
+        brackets = np.flatnonzero(np.sign(values[:-1]) * np.sign(values[1:]) < 0)
+        left, right = self.xs[brackets], self.xs[brackets + 1]
+        left_values = values[brackets]
+        scale = np.minimum(np.abs(left_values), np.abs(values[brackets + 1]))
+
+        for _step in range(BISECTION_STEPS):
+            middle = (left + right) / 2
+            same_sign = np.sign(evaluate(func, middle)) == np.sign(left_values)
+            left = np.where(same_sign, middle, left)
+            right = np.where(same_sign, right, middle)
+
+        middle = (left + right) / 2
+        is_root = np.abs(evaluate(func, middle)) <= ROOT_TOLERANCE * np.maximum(scale, 1)
+        grid_roots, grid_jumps = self._grid_zeros(func, values)
+        return np.sort(np.concatenate([grid_roots, middle[is_root]])), np.concatenate([grid_jumps, middle[~is_root]])
+
+    def _grid_zeros(self, func, values: np.ndarray) -> tuple:
+        """
+        Check the zeros at the grid points. The function must be small on both sides of them where it is defined,
+        otherwise it jumps there (e.g. sign(x) at zero). Zeros that are not isolated are underflow
+        (e.g. exp(x) for x < -745)
+        :param func: compiled function
+        :param values: values of the function on the grid
+        :return: two arrays: roots of the function and points where it jumps
+        """
+        inner = np.arange(1, len(values) - 1)
+        zeros = inner[(values[inner] == 0) & (values[inner - 1] != 0) & (values[inner + 1] != 0)]
+        points = self.xs[zeros]
+        scale = np.minimum(np.abs(values[zeros - 1]), np.abs(values[zeros + 1]))
+        step = np.maximum(1, np.abs(points)) * PROBE_DISTANCES[-1]
+        near = np.abs(np.stack([evaluate(func, points - step), evaluate(func, points + step)]))
+        is_root = ~np.any(near > ROOT_TOLERANCE * np.maximum(scale, 1), axis=0)
+        return points[is_root], points[~is_root]
+
+    def _domain_ends(self) -> np.ndarray:
+        """
+        :return: points where the function becomes undefined (e.g. zero for log(x))
+        """
+        defined = ~np.isnan(self.ys)
+        brackets = np.flatnonzero(defined[:-1] != defined[1:])
+        left, right = self.xs[brackets], self.xs[brackets + 1]
+        left_defined = defined[brackets]
+
+        for _step in range(BISECTION_STEPS):
+            middle = (left + right) / 2
+            same = ~np.isnan(self._evaluate(middle)) == left_defined
+            left = np.where(same, middle, left)
+            right = np.where(same, right, middle)
+
+        return np.where(left_defined, left, right)
+
+    def _limits(self) -> np.ndarray:
+        """
+        :return: approximate values that the function approaches at singular points and at infinity
+        """
+        points = self._singular[:, np.newaxis, np.newaxis]
+        sides = np.array([-1, 1])[:, np.newaxis]
+        probes = np.concatenate([points + sides * np.array(PROBE_DISTANCES) * np.maximum(1, np.abs(points)),
+                                 (sides * self.window * np.array(INFINITY_PROBES))[np.newaxis]])
+        values = self._evaluate(probes)
+
+        # Bounded functions approach the last values (e.g. acot(x) at zero), unbounded ones approach infinity
+        limits = values[..., -1]
+        return np.where(_grows_without_bound(values), np.copysign(np.inf, limits), limits).ravel()
+
+    def _candidates(self) -> np.ndarray:
+        """
+        :return: values of the function at the grid, at the stationary points and its limits
+        """
+        values = np.concatenate([self.ys, self._evaluate(self._stationary), self._limits()])
+        return values[~np.isnan(values)]
+
+    def _points(self, points: np.ndarray) -> sy.Set:
+        """
+        Merge close points and convert them into the set. Only the points that are the closest to zero are kept
+        :param points: sorted array of points
+        :return: finite set of approximate values
+        """
+        if len(points) > 0:
+            distinct = np.diff(points) > ROOT_TOLERANCE * np.maximum(1, np.abs(points[1:]))
+            points = points[np.concatenate([[True], distinct])]
+        points = points[np.argsort(np.abs(points), kind="stable")][:self.max_points]
+        return sy.FiniteSet(*(_number(point) for point in points))
+
+    def zeros(self) -> sy.Set:
+        """
+        :return: the approximate zeros of the function
+        """
+        return self._points(self._roots)
+
+    def stationary_points(self) -> sy.Set:
+        """
+        :return: the approximate points where the derivative is zero
+        """
+        return self._points(self._stationary)
+
+    def maximum(self) -> sy.Expr:
+        """
+        :return: the approximate maximum value of the function (it is oo if the function is unbounded)
+        """
+        if len(values := self._candidates()) == 0:
+            return sy.EmptySet
+        return _number(values.max())
+
+    def minimum(self) -> sy.Expr:
+        """
+        :return: the approximate minimum value of the function (it is -oo if the function is unbounded)
+        """
+        if len(values := self._candidates()) == 0:
+            return sy.EmptySet
+        return _number(values.min())
+
+    def range(self) -> sy.Set:
+        """
+        :return: the approximate value range of the function (between the minimum and the maximum).
+            The range of a function with jumps or poles or with a disconnected domain may have gaps
+            (e.g. it doesn't contain zero for 1 / x), so ValueError is raised for it
+        """
+        defined = ~np.isnan(self.ys)
+        if len(self._jumps) > 0 or np.count_nonzero(np.diff(defined.astype(int)) == 1) + defined[0] > 1:
+            raise ValueError("The value range of discontinuous function can't be approximated")
+        if len(values := self._candidates()) == 0:
+            return sy.EmptySet
+        return sy.Interval(_number(values.min()), _number(values.max()))
+
+
+def _number(value: float) -> sy.Expr:
+    """
+    :return: sympy number with PRECISION significant digits or infinity
+    """
+    if np.isinf(value):
+        return sy.oo if value > 0 else -sy.oo
+    return sy.Float(float(value), PRECISION)
@@ -1,14 +1,107 @@
 """
 An abstract class represents parser for user input
 """
-import difflib
-import re
 from abc import ABC, abstractmethod
+from functools import lru_cache
 
 import sympy as sy
-from sympy.parsing.sympy_parser import convert_xor, implicit_multiplication_application, standard_transformations
+from sympy.parsing.sympy_parser import (convert_xor, eval_expr, implicit_multiplication_application,
+                                        standard_transformations, stringify_expr)
 
+from source.conf.patterns import PatternRegistry
 from source.extras.translation import _
+from source.math import fast_parser
+from source.math.complexity import ExpressionBudget, SYMPY_NAMESPACE
+from source.math.math_function import replace_incorrect_functions
+
+# Transformations applied to all user expressions
+TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application, convert_xor)
+
+# The number of parsed expressions kept in memory
+PARSE_CACHE_SIZE = 2048
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_cached(text: str, transformations: tuple) -> sy.Basic:
+    # Simple expressions are parsed in one pass, sympy parser is used for the rest
+    if transformations == TRANSFORMATIONS and (expression := fast_parser.parse(text)) is not None:
+        return expression
+
+    # The same as sympy.parse_expr, but the code is checked before it is evaluated
+    code = stringify_expr(replace_incorrect_functions(text), {}, SYMPY_NAMESPACE, transformations)
+    ExpressionBudget().check_code(code)
+    return eval_expr(code, {}, SYMPY_NAMESPACE)
+
+
+def parse_expression(text: str, transformations: tuple = TRANSFORMATIONS) -> sy.Basic:
+    """
+    Parse the string into sympy expression. Our names of the functions (e.g. tg, arcctg) are replaced with sympy ones.
+    Parsed expressions are cached by the normalized string and the transformations. Sympy expressions are immutable,
+    so the same object is safely returned for equal inputs.
+    The complexity of the expression is limited (see ExpressionBudget), it is checked before the expression is
+    evaluated, so ComplexityError is raised before sympy starts to compute huge numbers
+    :param text: string to parse
+    :param transformations: sympy parser transformations
+    :return: sympy expression
+    """
+    return _parse_cached(" ".join(text.split()), transformations)
+
+
+class ParsedToken:
+    """
+    This class represents a token of the query (a function or an equation) parsed once.
+    Sides of the equation are parsed separately, and all later checks of the token reuse them
+
+    :param text: part of user input
+    """
+
+    # Tokens with more equal signs are not parsed
+    MAX_SIDES = 2
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = text.split('=')
+        self.sides = [parse_expression(part) for part in self.parts] if len(self.parts) <= self.MAX_SIDES else []
+
+    @property
+    def is_equation(self) -> bool:
+        """
+        :return: true if the token is like 'something = something'
+        """
+        return len(self.sides) == 2
+
+    @property
+    def symbols(self) -> set:
+        """
+        :return: variables of all sides
+        """
+        return set().union(*(side.free_symbols for side in self.sides))
+
+    @property
+    def is_y_definition(self) -> bool:
+        """
+        :return: true if the token is like 'y = f(x)', so the left part can be discarded
+        """
+        return self.is_equation and self.parts[0].strip() == "y" and \
+            len(self.sides[0].free_symbols & self.sides[1].free_symbols) == 0
+
+    @property
+    def is_x_equal_num(self) -> bool:
+        """
+        :return: true if the token is like 'x = 1'
+        """
+        symbols = self.symbols
+        return self.is_equation and len(symbols) == 1 and symbols != {sy.Symbol('y')}
+
+    def expression(self) -> sy.Expr:
+        """
+        :return: the expression itself, the right part of 'y = f(x)' or the difference of the sides of the equation
+        """
+        if not self.is_equation:
+            return self.sides[0]
+        if self.is_y_definition:
+            return self.sides[1]
+        return self.sides[0] - self.sides[1]
 
 
 class ParseError(Exception):
@@ -20,9 +113,6 @@ class Parser(ABC):
     Contains common methods that can be used in GraphParser and CalculusParser (and other in the future)
     """
 
-    # The accuracy of the prediction system. The bigger the number, the more similar the words need to be to correct it
-    PREDICTION_ACCURACY = 0.7
-
     def __init__(self):
         self._warnings = []
 
@@ -37,17 +127,7 @@ class Parser(ABC):
         :param token: string expression
         :return: true or false
         """
-        y = sy.Symbol('y')
-        result = False
-        parts = token.split('=')
-        rules = standard_transformations + (implicit_multiplication_application, convert_xor)
-        if len(parts) == 2:
-            first_part = sy.parse_expr(parts[0], transformations=rules)
-            second_part = sy.parse_expr(parts[1], transformations=rules)
-            symbols = first_part.free_symbols | second_part.free_symbols
-            result = len(symbols) == 1 and symbols != {y}
-
-        return result
+        return len(token.split('=')) == 2 and ParsedToken(token).is_x_equal_num
 
     @property
     def warnings(self) -> list:
@@ -70,25 +150,17 @@ class Parser(ABC):
         """
         self._warnings.append(warning)
 
-    def _fix_words(self, query: str, pattern_set: str, pattern_dict: dict, lang: str = "en") -> str:
+    def _fix_words(self, query: str, pattern_set: str, registry: PatternRegistry, lang: str = "en") -> tuple:
         """
         Tries to correct words to fit the pattern based on keywords of pattern
         :param lang:
         :param query: query to fix
         :param pattern_set: a class of query
-        :param pattern_dict: a dictionary where the keywords are
-        :return: if query was corrected, then function returns corrected string, else returns empty string
-        """
-        # Pick up words with length more than 2 chars
-        query_words = [word for word in re.split("[ =]", query) if len(word) > 2]
-        pattern_words = pattern_dict[pattern_set]["keywords"]
-        result = query
-
-        # Tries to find similar words and replace old ones with them in result
-        for word in query_words:
-            matches = difflib.get_close_matches(word, pattern_words, n=1, cutoff=self.PREDICTION_ACCURACY)
-            if len(matches) == 1 and matches[0] != word:
-                result = result.replace(word, str(matches[0]))
-                self.push_warning(_("Interpreting '{}' as '{}'", locale=lang).format(word, matches[0]))
-
-        return result if result != query else ""
+        :param registry: registry of patterns where the keywords are
+        :return: if query was corrected, then function returns corrected string, else returns empty string.
+            The second element is a list of warnings about the corrections, they should be pushed
+            only if the corrected query matches the pattern
+        """
+        result, corrections = registry.correct(query, pattern_set)
+        warnings = [_("Interpreting '{}' as '{}'", locale=lang).format(word, keyword) for word, keyword in corrections]
+        return result, warnings
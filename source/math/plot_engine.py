@@ -0,0 +1,278 @@
+"""
+Vectorized plotting engine. Functions are compiled once with lambdify and evaluated on NumPy arrays,
+then the resulting arrays are drawn directly on Matplotlib axes
+"""
+from functools import lru_cache
+
+import numpy as np
+import sympy as sy
+from matplotlib.axes import Axes
+from matplotlib.collections import LineCollection
+
+# Imaginary parts smaller than this value are considered as rounding errors
+IMAGINARY_TOLERANCE = 1e-9
+
+# The number of regula falsi iterations used to refine the points of implicit curves
+REFINEMENT_STEPS = 2
+
+# The number of compiled functions kept by every process. The same expressions are compiled again
+# by the consecutive renders of one request (e.g. the preview and the full-quality plot)
+COMPILED_FUNCTIONS_CACHE_SIZE = 256
+
+
+# Functions that are not translated into NumPy by lambdify
+NUMPY_FUNCTIONS = {
+    "cot": lambda x: 1 / np.tan(x),
+    "sec": lambda x: 1 / np.cos(x),
+    "csc": lambda x: 1 / np.sin(x),
+    "acot": lambda x: np.arctan(1 / x),
+    "asec": lambda x: np.arccos(1 / x),
+    "acsc": lambda x: np.arcsin(1 / x),
+    "coth": lambda x: 1 / np.tanh(x),
+    "sech": lambda x: 1 / np.cosh(x),
+    "csch": lambda x: 1 / np.sinh(x),
+    "acoth": lambda x: np.arctanh(1 / x),
+    "asech": lambda x: np.arccosh(1 / x),
+    "acsch": lambda x: np.arcsinh(1 / x)
+}
+
+
+@lru_cache(maxsize=COMPILED_FUNCTIONS_CACHE_SIZE)
+def compile_function(expr: sy.Expr, *symbols: sy.Symbol):
+    """
+    Convert sympy expression into a vectorized NumPy function. Compiled functions are memoized
+    :param expr: sympy expression to compile
+    :param symbols: arguments of the compiled function
+    :return: callable object that takes NumPy arrays
+    """
+    return sy.lambdify(symbols, expr, modules=[NUMPY_FUNCTIONS, "numpy"])
+
+
+def _to_real(values: np.ndarray, keep_infinite: bool = False) -> np.ndarray:
+    """
+    Drop complex and infinite values of evaluated function (replace them with NaN), so Matplotlib
+    doesn't draw them
+    :param values: evaluated values
+    :param keep_infinite: whether to keep real infinite values (e.g. overflows)
+    :return: array of floats
+    """
+    if np.iscomplexobj(values):
+        values = np.where(np.abs(values.imag) <= IMAGINARY_TOLERANCE, values.real, np.nan)
+    values = np.array(values, dtype=float)
+    values[np.isnan(values) if keep_infinite else ~np.isfinite(values)] = np.nan
+    return values
+
+
+def evaluate(func, *args: np.ndarray, keep_infinite: bool = False) -> np.ndarray:
+    """
+    Evaluate compiled function on the given arrays. The points at which the function is not real in NumPy
+    floating-point arithmetic are recalculated in complex arithmetic (e.g. root(x, 3) or sqrt(x)**2 for x < 0),
+    so the result is the same as if we evaluated the function point by point with sympy
+    :param func: compiled function (see compile_function)
+    :param args: arrays of arguments with the same shapes
+    :param keep_infinite: whether to keep real infinite values, they are replaced with NaN by default
+    :return: array of real values of the function (NaN where the function is not defined)
+    """
+    shape = np.broadcast(*args).shape
+    with np.errstate(all="ignore"):
+        values = _to_real(np.broadcast_to(func(*args), shape), keep_infinite)
+
+        undefined = np.isnan(values)
+        if undefined.any():
+            complex_args = [np.broadcast_to(arg, shape)[undefined].astype(complex) for arg in args]
+            values[undefined] = _to_real(np.broadcast_to(func(*complex_args), complex_args[0].shape), keep_infinite)
+
+    return values
+
+
+def sample_explicit(expr: sy.Expr, domain: list, points: int) -> tuple:
+    """
+    Evaluate explicit function y = f(x) on the uniform grid
+    :param expr: sympy expression with one variable (or a constant)
+    :param domain: list of left and right x-limit
+    :param points: number of points in the grid
+    :return: two arrays: x and y values
+    """
+    symbols = list(expr.free_symbols) or [sy.Symbol("x")]
+    xs = np.linspace(domain[0], domain[1], points)
+    ys = evaluate(compile_function(expr, *symbols), xs)
+    return xs, ys
+
+
+def draw_explicit(ax: Axes, expr: sy.Expr, domain: list, points: int, **kwargs):
+    """
+    Draw explicit function on the axes
+    :param ax: matplotlib axes to draw on
+    :param expr: sympy expression with one variable (or a constant)
+    :param domain: list of left and right x-limit
+    :param points: number of points in the grid
+    :param kwargs: parameters of the line (label, color, etc.)
+    """
+    xs, ys = sample_explicit(expr, domain, points)
+    ax.plot(xs, ys, **kwargs)
+
+
+def implicit_function(expr: sy.Basic) -> tuple:
+    """
+    Convert implicit function into the form 'f(x, y) = 0' or 'f(x, y) > 0'
+    :param expr: sympy expression, equation or inequality
+    :return: a tuple of f(x, y) and the flag if it is an equation
+    """
+    if isinstance(expr, sy.Equality):
+        return expr.lhs - expr.rhs, True
+    if isinstance(expr, (sy.GreaterThan, sy.StrictGreaterThan)):
+        return expr.lhs - expr.rhs, False
+    if isinstance(expr, (sy.LessThan, sy.StrictLessThan)):
+        return expr.rhs - expr.lhs, False
+    if isinstance(expr, sy.core.relational.Relational):
+        raise TypeError(f"Unsupported relation: {expr}")
+
+    # Expressions like 'x*y - 1' mean 'x*y - 1 = 0'
+    return expr, True
+
+
+def sample_implicit(func, domain: list, rng: list, resolution: tuple) -> tuple:
+    """
+    Evaluate function of two variables on the uniform grid
+    :param func: compiled function f(x, y)
+    :param domain: list of left and right x-limit
+    :param rng: list of bottom and top y-limit
+    :param resolution: number of grid nodes along x and y axes
+    :return: x nodes, y nodes and values of the function (rows correspond to y nodes)
+    """
+    xs = np.linspace(domain[0], domain[1], resolution[0])
+    ys = np.linspace(rng[0], rng[1], resolution[1])
+    x_grid, y_grid = np.meshgrid(xs, ys)
+    return xs, ys, evaluate(func, x_grid, y_grid)
+
+
+def _edge_crossings(func, start: np.ndarray, end: np.ndarray, start_values: np.ndarray,
+                    end_values: np.ndarray) -> np.ndarray:
+    """
+    Find the points where the function turns to zero on the grid edges with a sign change.
+    Linear interpolation is refined by several regula falsi iterations. The sign changes at which the function
+    does not become small (e.g. poles like in 1/x) are discarded
+    :param func: compiled function f(x, y)
+    :param start: coordinates of the first ends of the edges, shape (..., 2)
+    :param end: coordinates of the second ends of the edges, shape (..., 2)
+    :param start_values: function values at the first ends
+    :param end_values: function values at the second ends
+    :return: coordinates of the zeros (NaN for the edges without zero), shape (..., 2)
+    """
+    crossing = (start_values > 0) != (end_values > 0)
+    crossing &= ~(np.isnan(start_values) | np.isnan(end_values))
+    points = np.full(start.shape, np.nan)
+
+    left, right = start[crossing], end[crossing]
+    left_values, right_values = start_values[crossing], end_values[crossing]
+    limit = np.maximum(np.abs(left_values), np.abs(right_values))
+
+    with np.errstate(all="ignore"):
+        for _ in range(REFINEMENT_STEPS):
+            weight = (left_values / (left_values - right_values))[:, np.newaxis]
+            middle = left + weight * (right - left)
+            middle_values = evaluate(func, middle[:, 0], middle[:, 1])
+
+            # Keep the half of the edge on which the function changes the sign
+            same_side = ((middle_values > 0) == (left_values > 0))[:, np.newaxis]
+            left = np.where(same_side, middle, left)
+            left_values = np.where(same_side[:, 0], middle_values, left_values)
+            right = np.where(same_side, right, middle)
+            right_values = np.where(same_side[:, 0], right_values, middle_values)
+
+        weight = (left_values / (left_values - right_values))[:, np.newaxis]
+        zeros = left + weight * (right - left)
+        zero_values = np.abs(evaluate(func, zeros[:, 0], zeros[:, 1]))
+
+    # At a pole the function grows between the grid nodes instead of turning to zero
+    zeros[~(zero_values <= limit)] = np.nan
+    points[crossing] = zeros
+    return points
+
+
+def marching_squares(func, xs: np.ndarray, ys: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Extract the zero contour of the function from its values on the grid
+    :param func: compiled function f(x, y), it is used to refine the contour
+    :param xs: x nodes of the grid
+    :param ys: y nodes of the grid
+    :param values: function values on the grid (see sample_implicit)
+    :return: array of line segments, shape (n, 2, 2)
+    """
+    positive = values > 0
+    defined = ~np.isnan(values)
+
+    # Find the cells with a sign change on any edge. Only them are considered further, so the curve
+    # is extracted in time proportional to its length instead of the grid size
+    horizontal = (positive[:, :-1] != positive[:, 1:]) & defined[:, :-1] & defined[:, 1:]
+    vertical = (positive[:-1] != positive[1:]) & defined[:-1] & defined[1:]
+    rows, cols = np.nonzero(horizontal[:-1] | horizontal[1:] | vertical[:, :-1] | vertical[:, 1:])
+
+    # Corners of every cell in the counterclockwise order starting from the bottom left one.
+    # Edge k connects corners k and k + 1, so edges are: bottom, right, top, left
+    corner_rows = rows[:, np.newaxis] + [0, 0, 1, 1]
+    corner_cols = cols[:, np.newaxis] + [0, 1, 1, 0]
+    corners = np.stack((xs[corner_cols], ys[corner_rows]), axis=-1)
+    corner_values = values[corner_rows, corner_cols]
+    edges = _edge_crossings(func, corners, np.roll(corners, -1, axis=1),
+                            corner_values, np.roll(corner_values, -1, axis=1))
+    has_zero = ~np.isnan(edges[..., 0])
+    count = has_zero.sum(axis=-1)
+
+    # Simple cells: the curve enters the cell through one edge and leaves through another
+    simple = edges[count == 2]
+    order = np.argsort(~has_zero[count == 2], axis=-1, kind="stable")[:, :2]
+    segments = [np.take_along_axis(simple, order[..., np.newaxis], axis=1)]
+
+    # Saddle cells: the curve crosses all four edges, so we choose the pair of segments by the value in the center
+    saddle = count == 4
+    if saddle.any():
+        center = corners[saddle].mean(axis=1)
+        with np.errstate(all="ignore"):
+            center_values = evaluate(func, center[:, 0], center[:, 1])
+        cells = edges[saddle]
+        # If the center has the same sign as the bottom left corner, cut off the bottom right and top left corners
+        cut_even = ((center_values > 0) == (corner_values[saddle, 0] > 0))[:, np.newaxis, np.newaxis]
+        first = np.where(cut_even, cells[:, [0, 1]], cells[:, [3, 0]])
+        second = np.where(cut_even, cells[:, [2, 3]], cells[:, [1, 2]])
+        segments.extend((first, second))
+
+    return np.concatenate(segments)
+
+
+def draw_implicit(ax: Axes, expr: sy.Basic, domain: list, rng: list, resolution: tuple, color, **kwargs):
+    """
+    Draw implicit function (equation or inequality) on the axes
+    :param ax: matplotlib axes to draw on
+    :param expr: sympy expression of variables 'x' and 'y'
+    :param domain: list of left and right x-limit
+    :param rng: list of bottom and top y-limit
+    :param resolution: number of grid nodes along x and y axes
+    :param color: color of the curve
+    :param kwargs: additional parameters of the line collection
+    """
+    function, is_equation = implicit_function(expr)
+    func = compile_function(function, *sy.symbols("x y"))
+    xs, ys, values = sample_implicit(func, domain, rng, resolution)
+
+    if is_equation:
+        ax.add_collection(LineCollection(marching_squares(func, xs, ys, values), colors=[color], **kwargs))
+    else:
+        ax.contourf(xs, ys, (values > 0).astype(float), levels=[0.5, 1.5], colors=[color])
+
+    # Line collection doesn't update limits, so the grid bounds have to be added manually
+    ax.update_datalim([(domain[0], rng[0]), (domain[1], rng[1])])
+    ax.autoscale_view()
+
+
+def set_axis_center(ax: Axes):
+    """
+    Move axes lines to the origin if it is visible, otherwise put them in the center of the plot
+    :param ax: matplotlib axes
+    """
+    x_low, x_high = ax.get_xlim()
+    y_low, y_high = ax.get_ylim()
+    ax.spines['left'].set_position(('data', 0) if min(x_low, x_high) <= 0 <= max(x_low, x_high) else 'center')
+    ax.spines['bottom'].set_position(('data', 0) if min(y_low, y_high) <= 0 <= max(y_low, y_high) else 'center')
+    ax.spines['right'].set_color('none')
+    ax.spines['top'].set_color('none')
@@ -0,0 +1,92 @@
+"""
+Tests for caches
+"""
+
+import pytest
+
+from source.extras.cache import LRUCache, RenderCache, ResultCache, fingerprint
+
+
+def test_fingerprint_is_canonical():
+    assert fingerprint({"a": [1, 2], "b": "c"}) == fingerprint({"b": "c", "a": [1, 2]})
+    assert fingerprint({"a": [1, 2]}) != fingerprint({"a": [2, 1]})
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"1234"
+    cache.put("c", b"1234")
+    assert "b" not in cache
+    assert cache.get("a") == b"1234" and cache.get("c") == b"1234"
+    assert cache.size == 8
+
+
+@pytest.mark.parametrize("value", [b"", b"1" * 10, b"1" * 11])
+def test_lru_cache_budget(value):
+    cache = LRUCache(10)
+    cache.put("a", value)
+    assert cache.size <= 10
+    assert (cache.get("a") == value) == (len(value) <= 10)
+
+
+def test_render_cache_tiers(tmp_path):
+    cache = RenderCache(100, 1000, tmp_path)
+    assert cache.get("key") is None
+    cache.put("key", b"image")
+    assert cache.get("key") == b"image"
+
+    # New cache instance (e.g. after restart) reads images from the disk
+    restarted = RenderCache(100, 1000, tmp_path)
+    assert restarted.get("key") == b"image"
+    assert restarted.get("key") == b"image"
+    assert cache.stats["memory hits"] == 1 and cache.stats["misses"] == 1
+    assert restarted.stats["disk hits"] == 1 and restarted.stats["memory hits"] == 1
+
+
+def test_render_cache_disk_budget(tmp_path):
+    cache = RenderCache(0, 10, tmp_path)
+    cache.put("first", b"12345678")
+    cache.put("second", b"12345678")
+    assert cache.get("first") is None
+    assert cache.get("second") == b"12345678"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["second"]
+
+
+class _Storage:
+    def __init__(self):
+        self.results = {}
+
+    async def get_result(self, fingerprint: str, kind: str) -> bytes | None:
+        return self.results.get((fingerprint, kind))
+
+    async def save_result(self, fingerprint: str, kind: str, value: bytes):
+        self.results[(fingerprint, kind)] = value
+
+
+@pytest.mark.asyncio
+async def test_result_cache_tiers():
+    storage = _Storage()
+    cache = ResultCache(100, storage)
+    assert await cache.get("key", "image") is None
+    await cache.put("key", "image", b"image")
+    assert await cache.get("key", "image") == b"image"
+    assert await cache.get("key", "text") is None
+    assert storage.results == {("key", "image"): b"image"}
+
+    # New cache instance (e.g. on another instance of the bot) reads results from the storage
+    restarted = ResultCache(100, storage)
+    assert await restarted.get("key", "image") == b"image"
+    assert await restarted.get("key", "image") == b"image"
+    assert cache.stats["memory hits"] == 1 and cache.stats["misses"] == 2
+    assert restarted.stats["storage hits"] == 1 and restarted.stats["memory hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_result_cache_without_storage():
+    cache = ResultCache(10)
+    await cache.put("key", "text", b"x ** 2")
+    await cache.put("large", "text", b"1" * 11)
+    assert await cache.get("key", "text") == b"x ** 2"
+    assert await cache.get("large", "text") is None
@@ -1,10 +1,14 @@
 """
 Tests for calculus parser
 """
+import asyncio
 
 import pytest
+import sympy as sy
 
 import source.math.calculus_parser as parser
+from source.extras.workers import JobTimeoutError
+from source.math.numeric import NumericResult
 from source.math.parser import ParseError
 
 
@@ -40,3 +44,118 @@ async def test_parse_success(expr, result):
 async def test_parse_error(expr, exception):
     with pytest.raises(exception):
         await parser.CalculusParser.parse(parser.CalculusParser(), expr)
+
+
+async def _fingerprint(query: str, lang: str = "en") -> str:
+    calculus_parser = parser.CalculusParser()
+    await calculus_parser.parse(query)
+    return calculus_parser.fingerprint(lang)
+
+
+@pytest.mark.asyncio
+async def test_fingerprint():
+    first = await _fingerprint("derivative of x^2 sin x")
+    assert first == await _fingerprint("diff x**2*sin(x)")
+    assert first != await _fingerprint("derivative of x^2 sin x", "ru")
+    assert first != await _fingerprint("domain of x^2 sin x")
+    assert await _fingerprint("diff x y by x") != await _fingerprint("diff x y by y")
+
+
+def _values(value) -> list:
+    if isinstance(value, sy.Interval):
+        return [value.inf, value.sup]
+    if isinstance(value, sy.FiniteSet):
+        return sorted(value)
+    return [value]
+
+
+@pytest.mark.parametrize("query, result", [("maximum of acot x", sy.pi / 2),
+                                           ("zeros of x - cos x", sy.FiniteSet(0.7390851332)),
+                                           ("range of acos(x)", sy.Interval(0, sy.pi))])
+@pytest.mark.asyncio
+async def test_numeric_fallback(query, result):
+    calculus_parser = parser.CalculusParser()
+    await calculus_parser.parse(query)
+    [numeric] = calculus_parser.calculate()
+    assert isinstance(numeric, NumericResult) and numeric.label == "numeric approximation"
+    assert type(numeric.value) == type(result) or numeric.value.is_Number and result.is_number
+    assert all(abs(a - b) < 1e-6 for a, b in zip(_values(numeric.value), _values(result)))
+
+
+@pytest.mark.parametrize("query", ["maximum of x^2", "derivative of acot x", "zeros of x + y"])
+@pytest.mark.asyncio
+async def test_numeric_fallback_is_not_used(query):
+    calculus_parser = parser.CalculusParser()
+    await calculus_parser.parse(query)
+    assert not any(isinstance(value, NumericResult) for value in calculus_parser.calculate())
+
+
+class _Pool:
+    """
+    Worker pool that runs the jobs in the current process and records how many of them run at once
+    """
+
+    def __init__(self, failing: str = None):
+        self.failing = failing
+        self.running = 0
+        self.most = 0
+        self.limits = []
+
+    async def run(self, func, *args, wall_time_limit: float = None):
+        self.running += 1
+        self.most = max(self.most, self.running)
+        self.limits.append(wall_time_limit)
+        try:
+            await asyncio.sleep(0)
+            if getattr(func.__self__, "action", None) == self.failing:
+                raise JobTimeoutError()
+            return func(*args)
+        finally:
+            self.running -= 1
+
+
+async def _study(monkeypatch, pool: _Pool, **workers) -> tuple:
+    monkeypatch.setattr(parser.CalculusParser, "_workers", pool)
+    monkeypatch.setattr(parser.CalculusParser, "WORKERS", {**parser.CalculusParser.WORKERS, **workers})
+    calculus_parser = parser.CalculusParser()
+    assert await calculus_parser.parse("full study of the function x^3 - 3x")
+    assert calculus_parser.action == "study"
+    return calculus_parser, await calculus_parser.process_query()
+
+
+@pytest.mark.asyncio
+async def test_study(monkeypatch):
+    pool = _Pool(failing="convexity")
+    calculus_parser, result = await _study(monkeypatch, pool, study_processes=3, study_time_limit=100)
+
+    assert len(result) == len(parser.STUDY_ACTIONS)
+    parts = dict(zip(parser.STUDY_ACTIONS, result))
+    assert parts["stationary points"] == [sy.FiniteSet(-1, 1)]
+    assert parts["convexity"] is None
+    assert sum(part is None for part in result) == 1
+
+    # The warm-up job and the parts share the limits of one study
+    assert len(pool.limits) == len(parser.STUDY_ACTIONS) + 1
+    assert pool.most == 3
+    assert all(0 < limit <= 100 for limit in pool.limits)
+
+    latex = calculus_parser.make_latex(result)
+    part = parser.CalculusParser("stationary points", calculus_parser.function)
+    assert part.make_latex(part.calculate()) in latex
+
+
+@pytest.mark.asyncio
+async def test_study_deadline(monkeypatch):
+    pool = _Pool()
+    _calculus_parser, result = await _study(monkeypatch, pool, study_time_limit=0)
+    assert result == [None] * len(parser.STUDY_ACTIONS)
+    assert not pool.limits
+
+
+@pytest.mark.asyncio
+async def test_study_in_parallel(monkeypatch):
+    # By default the parts of a study occupy every analysis worker at once
+    pool = _Pool()
+    await _study(monkeypatch, pool)
+    workers = parser.CalculusParser.WORKERS
+    assert pool.most == workers["study_processes"] >= workers["analysis_processes"] > 1
@@ -0,0 +1,61 @@
+"""
+Tests for the limits on the complexity of expressions
+"""
+import pytest
+import sympy as sy
+from sympy.parsing.sympy_parser import stringify_expr
+
+from source.math.calculus_parser import CalculusParser
+from source.math.complexity import ComplexityError, ExpressionBudget, SYMPY_NAMESPACE
+from source.math.fast_parser import parse
+from source.math.graph_parser import GraphParser
+from source.math.parser import ParseError, TRANSFORMATIONS, parse_expression
+
+LIMITS = {"max_nodes": 20, "max_depth": 5, "max_exponent": 100, "max_literal_digits": 10}
+
+
+def _check_code(text: str, budget: ExpressionBudget):
+    budget.check_code(stringify_expr(text, {}, SYMPY_NAMESPACE, TRANSFORMATIONS))
+
+
+@pytest.mark.parametrize("text", ["x^2 + y^2", "sin(cos(x))", "2^100", "0.5^100 x", "(x + 1)^-100", "12345678.9x",
+                                  "x + x + x + x + x + x", "10!", "x!", "2^(4!)"])
+def test_budget_allows(text):
+    parse(text, ExpressionBudget(LIMITS))
+    _check_code(text, ExpressionBudget(LIMITS))
+
+
+@pytest.mark.parametrize("text", ["(10^5)!", "100!", "70!!", "x^(5!)", "factorial(2^10)"])
+def test_budget_rejects_factorials(text):
+    with pytest.raises(ComplexityError):
+        _check_code(text, ExpressionBudget(LIMITS))
+
+
+@pytest.mark.parametrize("text", ["x^101", "2^(50 + 51)", "10^20^2", "99^60", "(2^90)^4", "12345678901",
+                                  "sin(sin(sin(sin(sin(x)))))", "-(-(-(-(-x))))", " + ".join(["x"] * 11)])
+def test_budget_rejects(text):
+    with pytest.raises(ComplexityError):
+        parse(text, ExpressionBudget(LIMITS))
+    with pytest.raises(ComplexityError):
+        _check_code(text, ExpressionBudget(LIMITS))
+
+
+@pytest.mark.parametrize("text", ["9^9^9^9", "9^9^9^9 + 2e0", "((9^999)^999)^999", "x^(10^10)",
+                                  "sin(" * 50 + "x" + ")" * 50, "1" * 100, " + ".join(["x^2"] * 200)])
+def test_parse_expression_rejects(text):
+    with pytest.raises(ComplexityError):
+        parse_expression(text)
+
+
+def test_parse_expression_allows():
+    assert parse_expression("2^1000 x") == 2 ** 1000 * sy.Symbol("x")
+    assert parse_expression("(x + 1)^10 + 2e0") == (sy.Symbol("x") + 1) ** 10 + sy.Float(2)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query", ["9^9^9^9", "y = x^99999", "(10^5)!"])
+async def test_parsers_reject(query):
+    with pytest.raises(ParseError):
+        await GraphParser().parse(query)
+    with pytest.raises(ParseError):
+        await CalculusParser().parse(f"derivative of {query}")
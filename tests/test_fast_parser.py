@@ -0,0 +1,67 @@
+"""
+Tests for the fast parser of simple expressions
+"""
+import json
+from pathlib import Path
+
+import pytest
+import sympy as sy
+
+from source.math import parser
+from source.math.calculus_parser import CalculusParser
+from source.math.fast_parser import parse
+from source.math.graph_parser import GraphParser
+from source.math.math_function import replace_incorrect_functions
+from source.math.parser import ParseError, TRANSFORMATIONS
+
+with open(Path(__file__).resolve().parents[1] / "resources" / "examples.json", encoding="utf-8") as file:
+    examples = json.load(file)
+
+
+def _sympy_parse(text: str) -> sy.Basic:
+    return sy.parse_expr(replace_incorrect_functions(text), transformations=TRANSFORMATIONS)
+
+
+@pytest.mark.parametrize("text", ["sin x", "3x + 4y", "x^2 + y^2", "root(x, 3)", "2x sin x", "x^2 + y", "x y",
+                                  "tg x", "ctg(x) + arctg 2x", "tgx + 2tg x", "arcsin x - arccos(x) + arcctg x^2",
+                                  "sin(x)cos(x) + 0.5sin x", "2/xy", "-x^2", "2^-x^2", "x^2^3", "abcdef",
+                                  "sin 2x^2 y / 3", "x sin x y / 2", "sin cos(x) y", "(x + 1)(x - 1)", "x(y + 1)",
+                                  "sin pi", "2pi x", "theta x", "log(x, 3^x * sin x^2)", "1.5^x * 3 - +x",
+                                  "e^x", "abs x + sqrt(x)", "diff(1/sin x)", "x/2y", "-2x"])
+def test_parse(text):
+    result = parse(text)
+    assert result is not None
+    assert sy.srepr(result) == sy.srepr(_sympy_parse(text))
+
+
+@pytest.mark.parametrize("text", ["", "x!", "2e5", "2j", "0x1", "05", "x2", "x_1", "sin^2 x", "sin -x", "sin",
+                                  "sin x (x + 1)", "sin x cos x", "gamma(x)", "E", "lambda", "ctg pi**x",
+                                  "x = 1", "(x, y)", "root(x)", "x + * 2", "f(x]"])
+def test_parse_unsupported(text):
+    assert parse(text) is None
+
+
+@pytest.mark.asyncio
+async def test_parse_examples(monkeypatch):
+    texts = []
+
+    def recorder(text, transformations):
+        texts.append(text)
+        return sy.parse_expr(replace_incorrect_functions(text), transformations=transformations)
+
+    monkeypatch.setattr(parser, "_parse_cached", recorder)
+    for query in examples["graph"]:
+        try:
+            await GraphParser().parse(query)
+        except ParseError:
+            pass
+    for query in examples["analysis"]:
+        try:
+            await CalculusParser().parse(query)
+        except ParseError:
+            pass
+
+    parsed = [text for text in texts if parse(text) is not None]
+    assert len(parsed) > len(texts) / 2
+    for text in parsed:
+        assert sy.srepr(parse(text)) == sy.srepr(_sympy_parse(text))
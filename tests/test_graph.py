@@ -0,0 +1,61 @@
+"""
+Tests for graph drawing
+"""
+
+import pytest
+import sympy as sy
+from sympy.abc import x, y
+
+from source.math.graph import Graph, DrawError
+from source.math.graph_parser import GraphParser
+from source.math.math_function import MathFunction
+
+
+async def _parse(query: str) -> dict:
+    parser = GraphParser()
+    await parser.parse(query)
+    return parser.tokens
+
+
+@pytest.mark.parametrize("query", ["sin x", "x^2 + y^2 = 16, ratio = 1", "x = 1, y = x^2, x from -5 to 5",
+                                   "x > y", "sqrt x, y from 0 to 10"])
+@pytest.mark.asyncio
+async def test_render(query):
+    image = Graph.render(await _parse(query))
+    assert image.data.startswith(b"\x89PNG")
+    assert max(image.size) <= Graph.OUTPUT["max_side"]
+
+
+@pytest.mark.asyncio
+async def test_fingerprint():
+    first = Graph.fingerprint(await _parse("y = x^2, x from -5 to 5"))
+    assert first == Graph.fingerprint(await _parse("x**2,  x in [-5, 5]"))
+    assert first != Graph.fingerprint(await _parse("y = x^2, x from -5 to 6"))
+    assert first != Graph.fingerprint(await _parse("y = x^2, x from -5 to 5"), "ru")
+
+
+def test_render_error():
+    tokens = {'aspect ratio': [], 'domain': [], 'range': [], 'explicit': [],
+              'implicit': [MathFunction("x != y", sy.Ne(x, y), "implicit", [x, y])]}
+    with pytest.raises(DrawError):
+        Graph.render(tokens)
+
+
+@pytest.mark.asyncio
+async def test_render_reuses_figures():
+    tokens = await _parse("sin x, cos x, x from -5 to 5, ratio = 2")
+    first = Graph.render(tokens)
+    Graph.render(await _parse("x^3, y from -1 to 100"))
+    assert Graph.render(tokens).data == first.data
+
+
+@pytest.mark.asyncio
+async def test_render_preview():
+    tokens = await _parse("x^2 + y^2 = 16, x*y = 1, sin x")
+    assert Graph.needs_preview(tokens)
+    assert not Graph.needs_preview(await _parse("sin x"))
+
+    preview = Graph.render(tokens, preview=True)
+    full = Graph.render(tokens)
+    assert max(preview.size) < max(full.size)
+    assert len(preview) < len(full)
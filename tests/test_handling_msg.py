@@ -0,0 +1,91 @@
+"""
+Tests for the handlers of bot messages
+"""
+
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from source.extras.cache import RenderCache
+from source.extras.image_encoder import EncodedImage
+from source.math.graph import Graph, DrawError
+
+# The old motor can't be imported on Python 3.11+, the bot runs on Python 3.10 (see Dockerfile)
+handling_msg = pytest.importorskip("source.core.handling_msg", exc_type=ImportError)
+Handler = handling_msg.Handler
+
+
+class _Bot:
+    """
+    Bot that records the sent messages
+    """
+
+    def __init__(self):
+        self.photos = []
+        self.edited = []
+
+    async def send_photo(self, chat_id: int, photo, caption: str):
+        self.photos.append((chat_id, photo.read(), caption))
+        return True
+
+    async def edit_message_media(self, media, chat_id: int, message_id: int):
+        self.edited.append((chat_id, message_id))
+        return True
+
+
+class _Mongo:
+    """
+    Database without saved photos
+    """
+
+    async def get_file_id(self, _fingerprint: str):
+        return None
+
+    async def save_file_id(self, _fingerprint: str, _file_id: str):
+        pass
+
+
+class _Message:
+    """
+    Message with the graph request from the user
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.chat = SimpleNamespace(id=1)
+        self.from_user = SimpleNamespace(id=1)
+        self.replies = []
+
+    def get_command(self):
+        return None
+
+    async def reply(self, text: str):
+        self.replies.append(text)
+
+
+@pytest.mark.asyncio
+async def test_graph_preview_failure(monkeypatch, tmp_path):
+    async def draw(_graph, _tokens, _lang="en", preview=False):
+        if preview:
+            raise DrawError("The preview failed")
+        return EncodedImage(b"image", "png", (1, 1), 0.0)
+
+    async def get_language(_user, _mongo):
+        return "en"
+
+    bot = _Bot()
+    monkeypatch.setattr(Handler, "bot", bot)
+    monkeypatch.setattr(Handler, "mongo", _Mongo())
+    monkeypatch.setattr(Handler, "logger", logging.getLogger(__name__))
+    monkeypatch.setattr(Handler, "render_cache", RenderCache(1024, 1024, tmp_path))
+    monkeypatch.setattr(handling_msg, "get_language", get_language)
+    monkeypatch.setattr(Graph, "draw", draw)
+    monkeypatch.setattr(Graph, "needs_preview", staticmethod(lambda tokens: True))
+
+    # The full-quality image is sent as usual
+    message = _Message("x^2")
+    await Handler.send_graph(message)
+    assert not message.replies
+    assert not bot.edited
+    assert [photo for _chat_id, photo, _caption in bot.photos] == [b"image"]
@@ -0,0 +1,37 @@
+"""
+Tests for image encoder
+"""
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from source.extras.image_encoder import encode_image
+
+
+def _noise(width: int, height: int) -> Image.Image:
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+
+@pytest.mark.parametrize("image_format", ["png", "webp", "jpeg"])
+def test_encode_image_format(image_format):
+    encoded = encode_image(Image.new("RGB", (300, 200), "white"), image_format)
+    decoded = Image.open(BytesIO(encoded.data))
+    assert decoded.format.lower() == image_format
+    assert decoded.size == encoded.size == (300, 200)
+    assert encoded.encode_time >= 0
+
+
+def test_encode_image_max_side():
+    encoded = encode_image(Image.new("RGB", (4000, 1000), "white"), max_side=1000)
+    assert encoded.size == (1000, 250)
+
+
+@pytest.mark.parametrize("image_format", ["png", "jpeg"])
+def test_encode_image_byte_budget(image_format):
+    budget = 60000
+    encoded = encode_image(_noise(800, 600), image_format, max_bytes=budget)
+    assert len(encoded) <= budget
+    assert encoded.size[0] < 800
@@ -22,6 +22,21 @@ def test_replace_incorrect_functions(incorrect, correct):
     assert math_f.replace_incorrect_functions(incorrect) == correct
 
 
+@pytest.mark.parametrize('text, result', [('tg x + ctg x', 'tan x + cot x'),
+                                          ('2tg(x)', '2tan(x)'),
+                                          ('arctan x * arctg x', 'atan x * atan x'),
+                                          ('tgx + xtg + tg2 + tg_1', 'tgx + xtg + tg2 + tg_1'),
+                                          ('atan(x) + cot(x) + tan(x)', 'atan(x) + cot(x) + tan(x)')])
+def test_alias_rewriter(text, result):
+    assert math_f.AliasRewriter(math_f.FUNCTION_ALIASES).rewrite(text) == result
+
+
+def test_alias_rewriter_custom():
+    rewriter = math_f.AliasRewriter({"lg": "log10", "l": "log"})
+    assert rewriter.rewrite("lg x + l(x) + lgx") == "log10 x + log(x) + lgx"
+    assert math_f.AliasRewriter({}).rewrite("tg x") == "tg x"
+
+
 @pytest.mark.parametrize("expr, result", [
     (MathFunction("", x ** 5 + 3 * x ** 4 - 2 * x ** 2 + x - 10), 5 * x ** 4 + 12 * x ** 3 - 4 * x + 1),
     (MathFunction("", sy.sin(3 * x ** 2)), 6 * x * sy.cos(3 * x ** 2)),
@@ -77,7 +92,10 @@ def test_axis_intersection(expr, result):
                                           (MathFunction("", x ** 2, symbols=[x]), True),
                                           (MathFunction("", sy.sqrt(x ** 2), symbols=[x]), True),
                                           (MathFunction("", sy.ln(x + 1), symbols=[x]), False),
-                                          (MathFunction("", sy.ln(sy.sqrt(x ** 2)), symbols=[x]), True)])
+                                          (MathFunction("", sy.ln(sy.sqrt(x ** 2)), symbols=[x]), True),
+                                          (MathFunction("", sy.sin(x) ** 2 - sy.cos(x) ** 2, symbols=[x]), True),
+                                          (MathFunction("", x * sy.cosh(x) / sy.sinh(x), symbols=[x]), True),
+                                          (MathFunction("", sy.floor(x) + x ** 2, symbols=[x]), False)])
 def test_is_even(expr, result):
     assert expr.is_even(*expr.symbols) == result
 
@@ -99,6 +117,16 @@ def test_is_odd(expr, result):
     assert expr.is_odd(*expr.symbols) == result
 
 
+@pytest.mark.parametrize("expr", [sy.exp(x) + sy.sin(x) ** 3 / (x ** 2 + 1), sy.log(x + 1) * x, sy.floor(x) + x ** 3])
+def test_parity_without_simplification(expr, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the function is simplified")
+
+    monkeypatch.setattr(math_f, "IDENTITY_SIMPLIFICATIONS", (fail,))
+    function = MathFunction("", expr, symbols=[x])
+    assert not function.is_even(x) and not function.is_odd(x)
+
+
 @pytest.mark.parametrize("expr, result", [(MathFunction("", 1 / x, symbols=[x]), {0}),
                                           (MathFunction("", sy.ln(x), symbols=[x]), {0}),
                                           (MathFunction("", 1 / (x ** 2), symbols=[x]), {0}),
@@ -134,7 +162,9 @@ def test_domain(expr, result):
                                           (MathFunction("", sy.log(x), symbols=[x]), sy.Interval(-sy.oo, sy.oo)),
                                           (MathFunction("", 2 ** x, symbols=[x]), sy.Interval.open(0, sy.oo)),
                                           (MathFunction("", sy.atan(x), symbols=[x]),
-                                           sy.Interval.open(-sy.pi / 2, sy.pi / 2))])
+                                           sy.Interval.open(-sy.pi / 2, sy.pi / 2)),
+                                          (MathFunction("", sy.sin(x) + sy.cos(x), symbols=[x]),
+                                           sy.Interval(-sy.sqrt(2), sy.sqrt(2)))])
 def test_frange(expr, result):
     assert expr.frange(*expr.symbols) == result
 
@@ -179,6 +209,41 @@ def test_convexity(expr, result):
     assert expr.concavity(*expr.symbols) == result
 
 
+@pytest.mark.parametrize("expr, result", [
+    (x ** 3, ["Strictly increasing", sy.Reals, sy.EmptySet]),
+    (sy.exp(-x), ["Strictly decreasing", sy.EmptySet, sy.Reals]),
+    (sy.sqrt(x), ["Strictly increasing", sy.Interval(0, sy.oo), sy.EmptySet]),
+    (sy.root(x, 3), ["Strictly increasing", sy.Interval.open(0, sy.oo), sy.EmptySet]),
+    (x ** 3 - 3 * x, ["Non-monotonic", sy.Interval(-sy.oo, -1) | sy.Interval(1, sy.oo), sy.Interval(-1, 1)]),
+    (1 / x, ["Strictly decreasing", sy.EmptySet, sy.Interval.open(-sy.oo, 0) | sy.Interval.open(0, sy.oo)]),
+    ((x ** 2 + 1) / (x - 1), ["Non-monotonic", sy.Interval(-sy.oo, 1 - sy.sqrt(2)) | sy.Interval(1 + sy.sqrt(2), sy.oo),
+                              sy.Interval.Ropen(1 - sy.sqrt(2), 1) | sy.Interval.Lopen(1, 1 + sy.sqrt(2))]),
+    (sy.Abs(x), ["Non-monotonic", sy.Interval(0, sy.oo), sy.Interval(-sy.oo, 0)]),
+    # The intervals of periodic and unsolved derivatives are not given
+    (sy.sin(x), ["Non-monotonic"]),
+    (x + sy.sin(x), ["Strictly increasing"]),
+    (sy.tan(x), ["Strictly increasing"]),
+    (sy.sin(x) / x, ["Non-monotonic"]),
+    (sy.Integer(5), ["Increasing"])])
+def test_monotonicity(expr, result):
+    assert MathFunction("", expr, symbols=[x]).monotonicity(x) == result
+
+
+def test_monotonicity_shares_stationary_points(monkeypatch):
+    calls = []
+    solveset = sy.solveset
+
+    def recorder(*args, **kwargs):
+        calls.append(args)
+        return solveset(*args, **kwargs)
+
+    monkeypatch.setattr(sy, "solveset", recorder)
+    function = MathFunction("", x ** 4 - 2 * x ** 2, symbols=[x])
+    function.stationary_points(x)
+    function.monotonicity(x)
+    assert len(calls) == 1
+
+
 @pytest.mark.parametrize("expr, result", [(MathFunction("", x, symbols=[x]), {sy.EmptySet}),
                                           (MathFunction("", 1 / x, symbols=[x]), {0}),
                                           (MathFunction("", 1 / x + 3, symbols=[x]), {3}),
@@ -205,7 +270,12 @@ def test_horizontal_asymptotes(expr, result):
                                           (MathFunction("", 2 * x ** 0, symbols=[x]), {sy.EmptySet}),
                                           (MathFunction("", sy.sqrt(x ** 2 + 1), symbols=[x]), {x, -x}),
                                           (MathFunction("", sy.sin(x), symbols=[x]), {sy.EmptySet}),
-                                          (MathFunction("", sy.cos(x), symbols=[x]), {sy.EmptySet})])
+                                          (MathFunction("", sy.cos(x), symbols=[x]), {sy.EmptySet}),
+                                          (MathFunction("", x + sy.sin(x), symbols=[x]), {sy.EmptySet}),
+                                          (MathFunction("", x + sy.sin(x) / x, symbols=[x]), {x}),
+                                          (MathFunction("", x + sy.sqrt(x), symbols=[x]), {sy.EmptySet}),
+                                          (MathFunction("", x * sy.atan(x), symbols=[x]),
+                                           {sy.pi * x / 2 - 1, -sy.pi * x / 2 - 1})])
 def test_slant_asymptotes(expr, result):
     assert expr.slant_asymptotes(*expr.symbols) == result
 
@@ -270,3 +340,54 @@ def test_minimum_exception(expr, exception):
                                            {-sy.sqrt(3) / 3, sy.sqrt(3) / 3})])
 def test_stationary_points(expr, result):
     assert expr.stationary_points(*expr.symbols) == result
+
+
+def test_analysis_context(monkeypatch):
+    calls = []
+    periodicity, limit = math_f.calculus.periodicity, math_f.sy.limit
+
+    def count(name, function):
+        def counter(expression, *args, **kwargs):
+            calls.append((name, expression, *args))
+            return function(expression, *args, **kwargs)
+        return counter
+
+    monkeypatch.setattr(math_f.calculus, "periodicity", count("periodicity", periodicity))
+    monkeypatch.setattr(math_f.sy, "limit", count("limit", limit))
+
+    function = MathFunction("", 1 / x + 3, symbols=[x])
+    assert function.context(x) is function.context(x)
+    assert function.context(x) is not function.context(y)
+
+    function.vertical_asymptotes(x)
+    function.horizontal_asymptotes(x)
+    function.slant_asymptotes(x)
+    function.periodicity(x)
+    assert calls.count(("periodicity", 1 / x + 3, x)) == 1
+    assert len(calls) == len(set(calls))
+    count = len(calls)
+
+    function.vertical_asymptotes(x)
+    function.horizontal_asymptotes(x)
+    function.slant_asymptotes(x)
+    assert len(calls) == count
+
+
+@pytest.mark.parametrize("expr, lines", [((x ** 2 + 3) / (x - 1), {sy.oo: (1, 1), -sy.oo: (1, 1)}),
+                                         (sy.sqrt(x ** 2 + 1), {sy.oo: (1, 0), -sy.oo: (-1, 0)}),
+                                         (sy.atan(x), {sy.oo: (0, sy.pi / 2), -sy.oo: (0, -sy.pi / 2)}),
+                                         (sy.log(x) / x, {sy.oo: (0, 0), -sy.oo: (0, 0)}),
+                                         (x ** 2, {sy.oo: None, -sy.oo: None}),
+                                         (sy.sin(x) + sy.cos(x), {sy.oo: None, -sy.oo: None})])
+def test_lines_at_infinity(expr, lines):
+    assert MathFunction("", expr, symbols=[x]).context(x).lines_at_infinity == lines
+
+
+def test_lines_at_infinity_of_periodic_function(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the limit is calculated")
+
+    monkeypatch.setattr(math_f.sy, "limit", fail)
+    monkeypatch.setattr(math_f.sy, "series", fail)
+    function = MathFunction("", sy.tan(x) + sy.sin(2 * x), symbols=[x])
+    assert function.horizontal_asymptotes(x) == function.slant_asymptotes(x) == {sy.EmptySet}
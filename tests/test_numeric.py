@@ -0,0 +1,85 @@
+"""
+Tests for the numeric analysis
+"""
+
+import pytest
+import sympy as sy
+from sympy.abc import x, y
+
+from source.math.numeric import NumericAnalysis, NumericResult, disproves_identity
+
+PARAMS = {"window": 100, "points": 20001, "max_points": 5}
+
+
+def _close(first: sy.Set, second: sy.Set) -> bool:
+    return len(first) == len(second) and all(abs(a - b) < 1e-6 for a, b in zip(sorted(first), sorted(second)))
+
+
+@pytest.mark.parametrize("expr, result", [(x ** 2 - 2, {-sy.sqrt(2), sy.sqrt(2)}),
+                                          (x - sy.cos(x), {0.7390851332}),
+                                          (x ** 3 - x, {-1, 0, 1}),
+                                          (1 / x, set()),
+                                          (sy.exp(10 * x), set()),
+                                          (sy.log(x), {1}),
+                                          (sy.sin(x), {0, sy.pi, -sy.pi, 2 * sy.pi, -2 * sy.pi})])
+def test_zeros(expr, result):
+    assert _close(NumericAnalysis(expr, x, PARAMS).zeros(), result)
+
+
+@pytest.mark.parametrize("expr, result", [(x ** 2, {0}),
+                                          (x ** 3 - x, {-1 / sy.sqrt(3), 1 / sy.sqrt(3)}),
+                                          (x * sy.exp(-x ** 2), {-1 / sy.sqrt(2), 1 / sy.sqrt(2)}),
+                                          (sy.Abs(x), set()),
+                                          (sy.Abs(x) - 1, set()),
+                                          (1 / x ** 2, set())])
+def test_stationary_points(expr, result):
+    assert _close(NumericAnalysis(expr, x, PARAMS).stationary_points(), result)
+
+
+@pytest.mark.parametrize("expr, minimum, maximum", [(x ** 2 - 2, -2, sy.oo),
+                                                    (1 / x, -sy.oo, sy.oo),
+                                                    (1 / x ** 2, 0, sy.oo),
+                                                    (sy.atan(x), -sy.pi / 2, sy.pi / 2),
+                                                    (sy.acot(x), -sy.pi / 2, sy.pi / 2),
+                                                    (sy.acos(x), 0, sy.pi),
+                                                    (sy.log(x), -sy.oo, sy.oo),
+                                                    (sy.sqrt(x), 0, sy.oo),
+                                                    (sy.exp(-x ** 2), 0, 1),
+                                                    (sy.Integer(3), 3, 3)])
+def test_extrema(expr, minimum, maximum):
+    analysis = NumericAnalysis(expr, x, PARAMS)
+    for value, expected in [(analysis.minimum(), minimum), (analysis.maximum(), maximum)]:
+        assert value == expected if sy.S(expected).is_infinite else abs(value - expected) < 1e-6
+    if expr not in (1 / x, sy.acot(x)):
+        assert analysis.range() == sy.Interval(analysis.minimum(), analysis.maximum())
+
+
+@pytest.mark.parametrize("expr", [1 / x, sy.acot(x), sy.sign(x), sy.log(x ** 2 - 1)])
+def test_range_with_gaps(expr):
+    with pytest.raises(ValueError):
+        NumericAnalysis(expr, x, PARAMS).range()
+
+
+@pytest.mark.parametrize("expr", [x + y, sy.gamma(x)])
+def test_unsupported(expr):
+    with pytest.raises(ValueError):
+        NumericAnalysis(expr, x, PARAMS)
+
+
+def test_numeric_result():
+    result = NumericResult(sy.FiniteSet(sy.Float(0.5)), "numeric")
+    assert str(result) == "{0.5} (numeric)"
+    assert sy.latex(result) == r"\left\{0.5\right\}\ \mathtt{\text{(numeric)}}"
+
+
+@pytest.mark.parametrize("left, right, result", [(sy.cos(-x), sy.cos(x), False),
+                                                 (sy.sin(x) ** 2 + sy.cos(x) ** 2, sy.Integer(1), False),
+                                                 (sy.log(sy.sqrt(x ** 2)), sy.log(sy.sqrt(x ** 2)), False),
+                                                 (sy.exp(-x), sy.exp(x), True),
+                                                 (sy.floor(-x), -sy.floor(x), True),
+                                                 (x ** 2 + y, x ** 2 - y, True),
+                                                 # Equal on the real axis, but not in the complex plane
+                                                 (sy.sqrt(x ** 2), sy.Abs(x), True),
+                                                 (sy.log(-x), sy.log(x), True)])
+def test_disproves_identity(left, right, result):
+    assert disproves_identity(left, right) == result
@@ -0,0 +1,69 @@
+"""
+Tests for common parser functions
+"""
+
+import pytest
+import sympy as sy
+from sympy.abc import x, y
+from sympy.parsing.sympy_parser import standard_transformations
+
+from source.math import parser
+from source.math.parser import Parser, ParsedToken, parse_expression
+
+
+@pytest.mark.parametrize("text, result", [("2x sin x", 2 * x * sy.sin(x)),
+                                          ("x^2 + y", x ** 2 + y),
+                                          ("  x   y ", x * y)])
+def test_parse_expression(text, result):
+    assert parse_expression(text) == result
+
+
+def test_parse_expression_cache():
+    first = parse_expression("3x^2 - cos(x y)")
+    assert parse_expression(" 3x^2  -  cos(x y) ") is first
+
+    # Another set of rules gives another result
+    assert parse_expression("2^3", standard_transformations) == 1
+    assert parse_expression("2^3") == 8
+
+
+def test_parse_expression_error():
+    for _ in range(2):
+        with pytest.raises(SyntaxError):
+            parse_expression("x + * 2")
+
+
+@pytest.mark.parametrize("token, result", [("x = 1", True), ("y = 1", False), ("x = y", False), ("x", False),
+                                           ("a = 2", True)])
+def test_is_x_equal_num_expression(token, result):
+    assert Parser.is_x_equal_num_expression(token) == result
+
+
+@pytest.mark.parametrize("token, expression, is_equation, is_y_definition, is_x_equal_num",
+                         [("x^2", x ** 2, False, False, False),
+                          ("y = x^2", x ** 2, True, True, False),
+                          (" y = y^2 + x", y - y ** 2 - x, True, False, False),
+                          ("x^2 + y^2 = 4", x ** 2 + y ** 2 - 4, True, False, False),
+                          ("sin x = 1", sy.sin(x) - 1, True, False, True),
+                          ("x = y = 1", None, False, False, False)])
+def test_parsed_token(token, expression, is_equation, is_y_definition, is_x_equal_num):
+    parsed = ParsedToken(token)
+    assert parsed.is_equation == is_equation
+    assert parsed.is_y_definition == is_y_definition
+    assert parsed.is_x_equal_num == is_x_equal_num
+    if expression is not None:
+        assert parsed.expression() == expression
+
+
+def test_parsed_token_parses_once(monkeypatch):
+    texts = []
+
+    def recorder(text):
+        texts.append(text)
+        return parse_expression(text)
+
+    monkeypatch.setattr(parser, "parse_expression", recorder)
+    parsed = ParsedToken("x^2 + y^2 = 16")
+    assert parsed.expression() == x ** 2 + y ** 2 - 16
+    assert not parsed.is_x_equal_num and not parsed.is_y_definition
+    assert texts == ["x^2 + y^2 ", " 16"]
@@ -0,0 +1,70 @@
+"""
+Tests for the registry of precompiled patterns
+"""
+import difflib
+import json
+import random
+import re
+import string
+from pathlib import Path
+
+import pytest
+
+from source.conf import Config
+from source.conf.patterns import KeywordIndex, PatternRegistry
+
+with open(Path(__file__).resolve().parents[1] / "resources" / "examples.json", encoding="utf-8") as file:
+    examples = json.load(file)
+
+
+def _match_one_by_one(pattern_dict: dict, query: str, pattern_set: str = None):
+    for current_set, value in pattern_dict.items():
+        if pattern_set is not None and current_set != pattern_set:
+            continue
+        for pattern, params in value["patterns"].items():
+            if match := re.match(pattern, query):
+                return current_set, match.groups(), list(map(int, params))
+    return None
+
+
+@pytest.mark.parametrize("query", examples["analysis"] + ["range of tan x", "is x^2 even", "unknown query"])
+def test_analysis_registry(query):
+    found = Config.analysis_registry.match(query)
+    expected = _match_one_by_one(Config.analysis_patterns, query)
+    assert (found and (found.pattern_set, found.match.groups(), found.params)) == expected
+
+
+@pytest.mark.parametrize("query", ["x from -5 to 5", "for y in [0, 1]", "domain = (1, 2)", "range in [-1; 1]",
+                                   "aspect ratio = 2", "ratio=0.5", "sin x"])
+def test_graph_registry(query):
+    found = Config.graph_registry.match(query)
+    expected = _match_one_by_one(Config.graph_patterns, query)
+    assert (found and (found.pattern_set, found.match.groups(), found.params)) == expected
+
+
+def test_pattern_set():
+    registry = PatternRegistry({"first": {"patterns": {"^a(b)$": ["1"]}, "keywords": ["ab"]},
+                                "second": {"patterns": {"^a(.)$": ["1"], "^(c)$": ["1"]}, "keywords": ["c"]}})
+    assert registry.match("ab").pattern_set == "first"
+    assert registry.match("ab", "second").pattern_set == "second"
+    assert registry.match("c", "first") is None
+    assert registry.match("c").match.group(1) == "c"
+    assert list(registry) == ["first", "second"]
+    assert registry.keywords("second") == ["c"]
+
+
+def test_keyword_index_is_equal_to_difflib():
+    keywords = sorted({word for value in Config.analysis_patterns.values() for word in value["keywords"]})
+    index = KeywordIndex(keywords, 0.7)
+    rng = random.Random(0)
+    words = keywords + ["".join(rng.choice(string.ascii_lowercase[:8]) for _ in range(rng.randint(3, 10)))
+                        for _ in range(500)]
+    for word in words + [word[:-1] + "x" for word in keywords] + [word[1:] for word in keywords]:
+        expected = difflib.get_close_matches(word, keywords, n=1, cutoff=0.7)
+        assert index.closest(word) == (expected[0] if expected else None)
+
+
+def test_correct():
+    registry = Config.analysis_registry
+    assert registry.correct("derivatve of x", "derivative") == ("derivative of x", (("derivatve", "derivative"),))
+    assert registry.correct("derivative of x", "derivative") == ("", ())
@@ -0,0 +1,74 @@
+"""
+Tests for plot engine
+"""
+
+import numpy as np
+import pytest
+import sympy as sy
+from sympy.abc import x, y
+
+import source.math.plot_engine as engine
+
+
+@pytest.mark.parametrize("expr, domain", [(sy.sin(x) * x, [-10, 10]),
+                                          (x ** 3 - 2 * x, [-2, 5]),
+                                          (sy.exp(-x) / (x ** 2 + 1), [-1, 1]),
+                                          (sy.Abs(x) + sy.cos(3 * x), [0, 20])])
+def test_sample_explicit_values(expr, domain):
+    xs, ys = engine.sample_explicit(expr, domain, 50)
+    expected = [float(expr.subs(x, float(value))) for value in xs]
+    assert len(xs) == 50
+    assert xs[0] == domain[0] and xs[-1] == domain[1]
+    assert np.allclose(ys, expected)
+
+
+def test_sample_explicit_constant():
+    xs, ys = engine.sample_explicit(sy.Integer(5), [-1, 1], 10)
+    assert ys.shape == xs.shape
+    assert np.all(ys == 5)
+
+
+@pytest.mark.parametrize("expr", [sy.sqrt(x), sy.log(x), sy.root(x, 3)])
+def test_sample_explicit_not_real(expr):
+    xs, ys = engine.sample_explicit(expr, [-4, 4], 9)
+    assert np.all(np.isnan(ys[xs < 0]))
+    assert np.all(np.isfinite(ys[xs > 0]))
+
+
+@pytest.mark.parametrize("expr", [sy.cot(x), sy.sec(x), sy.csc(x), sy.acot(x), sy.asec(x), sy.acsc(x),
+                                  sy.coth(x), sy.sech(x), sy.csch(x), sy.acoth(x), sy.asech(x), sy.acsch(x)])
+def test_sample_explicit_reciprocal_functions(expr):
+    xs, ys = engine.sample_explicit(expr, [-3, 3], 8)
+    expected = [complex(expr.subs(x, float(value)).evalf()) for value in xs]
+    expected = [value.real if abs(value.imag) <= engine.IMAGINARY_TOLERANCE else np.nan for value in expected]
+    assert np.allclose(ys, expected, equal_nan=True)
+
+
+def test_sample_explicit_division_by_zero():
+    _, ys = engine.sample_explicit(1 / x, [-1, 1], 3)
+    assert np.isnan(ys[1])
+
+
+@pytest.mark.parametrize("expr, distance", [(x ** 2 + y ** 2 - 16, lambda px, py: np.hypot(px, py) - 4),
+                                            (x * y - 5, lambda px, py: px * py - 5),
+                                            (x - 3, lambda px, py: px - 3)])
+def test_marching_squares_points_on_curve(expr, distance):
+    func = engine.compile_function(expr, x, y)
+    xs, ys, values = engine.sample_implicit(func, [-10, 10], [-10, 10], (200, 150))
+    segments = engine.marching_squares(func, xs, ys, values)
+    assert len(segments) > 0
+    assert np.allclose(distance(segments[..., 0], segments[..., 1]), 0, atol=1e-3)
+
+
+def test_marching_squares_skips_poles():
+    func = engine.compile_function(1 / x + 0 * y, x, y)
+    xs, ys, values = engine.sample_implicit(func, [-1, 1], [-1, 1], (50, 50))
+    assert len(engine.marching_squares(func, xs, ys, values)) == 0
+
+
+@pytest.mark.parametrize("expr, function, is_equation", [(sy.Eq(x ** 2, y), x ** 2 - y, True),
+                                                         (x * y - 1, x * y - 1, True),
+                                                         (x > y, x - y, False),
+                                                         (x <= y ** 2, y ** 2 - x, False)])
+def test_implicit_function(expr, function, is_equation):
+    assert engine.implicit_function(expr) == (function, is_equation)
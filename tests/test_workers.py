@@ -0,0 +1,64 @@
+"""
+Tests for the pool of worker processes
+"""
+import sys
+import time
+
+import pytest
+
+from source.extras.workers import WorkerPool, JobTimeoutError
+
+
+@pytest.fixture(scope="module")
+def pool():
+    workers = WorkerPool(1, wall_time_limit=2, cpu_time_limit=1)
+    yield workers
+    workers.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run(pool):
+    assert await pool.run(pow, 2, 10) == 1024
+
+
+@pytest.mark.asyncio
+async def test_exception(pool):
+    with pytest.raises(ValueError):
+        await pool.run(int, "not a number")
+
+
+@pytest.mark.asyncio
+async def test_wall_time_limit(pool):
+    start = time.monotonic()
+    with pytest.raises(JobTimeoutError):
+        await pool.run(time.sleep, 30)
+    assert time.monotonic() - start < 10
+
+    # The killed worker is replaced
+    assert await pool.run(pow, 3, 2) == 9
+
+
+@pytest.mark.asyncio
+async def test_job_wall_time_limit(pool):
+    start = time.monotonic()
+    with pytest.raises(JobTimeoutError):
+        await pool.run(time.sleep, 30, wall_time_limit=0.2)
+    assert time.monotonic() - start < 1.5
+
+    # The limit of the job can't exceed the limit of the pool
+    start = time.monotonic()
+    with pytest.raises(JobTimeoutError):
+        await pool.run(time.sleep, 30, wall_time_limit=100)
+    assert time.monotonic() - start < 10
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="CPU time limits are not supported on Windows")
+@pytest.mark.asyncio
+async def test_cpu_time_limit():
+    workers = WorkerPool(1, wall_time_limit=60, cpu_time_limit=1)
+    try:
+        with pytest.raises(JobTimeoutError):
+            await workers.run(sum, range(10 ** 12))
+        assert await workers.run(abs, -1) == 1
+    finally:
+        workers.shutdown()